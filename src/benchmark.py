@@ -0,0 +1,177 @@
+import argparse
+import itertools
+from qiskit import QuantumCircuit
+from configs import platforms, solvers, DEFAULT_TIME_LIMIT_S
+from synthesizers.sat.phys import PhysSynthesizer
+from util.circuits import SynthesizerSolution
+from util.logger import Logger
+import synthesizers.planning.solvers as planning
+
+parser = argparse.ArgumentParser(
+    description="Compares options of the SAT-based synthesizer on a set of benchmark circuits.",
+    prog="python src/benchmark.py",
+)
+
+parser.add_argument(
+    "-t",
+    "--time_limit",
+    type=int,
+    help=f"the time limit in seconds per run, default is {DEFAULT_TIME_LIMIT_S}s",
+    default=DEFAULT_TIME_LIMIT_S,
+)
+
+parser.add_argument(
+    "-p",
+    "--platform",
+    type=str,
+    help=f"the target platform: {', '.join(platforms.keys())} -- default: tenerife",
+    default="tenerife",
+)
+
+parser.add_argument(
+    "-s",
+    "--solver",
+    type=str,
+    help=f"the underlying SAT solver: {', '.join(name for name, solver in solvers.items() if not isinstance(solver, planning.Solver))} -- default: cadical153",
+    default="cadical153",
+)
+
+parser.add_argument(
+    "-opt",
+    "--option",
+    type=str,
+    action="append",
+    default=[],
+    help="a synthesizer option and the values to compare, e.g. 'enabled_encoding=full,support'. Can be given several times, all combinations are run.",
+)
+
+parser.add_argument(
+    "-csv",
+    "--csv",
+    type=str,
+    help="path to save the results as CSV",
+    default=None,
+)
+
+parser.add_argument(
+    "inputs",
+    type=str,
+    nargs="+",
+    help="the paths to the input files",
+)
+
+
+def counting(solver_class):
+    """
+    A subclass of a pysat solver class with the same name that counts the clauses added
+    to it.
+    """
+
+    def __init__(self):
+        solver_class.__init__(self)
+        self.clauses = 0
+
+    def add_clause(self, clause, no_return=True):
+        self.clauses += 1
+        return solver_class.add_clause(self, clause, no_return)
+
+    def append_formula(self, formula, no_return=True):
+        for clause in formula:
+            self.add_clause(clause, no_return)
+
+    return type(
+        solver_class.__name__,
+        (solver_class,),
+        {
+            "__init__": __init__,
+            "add_clause": add_clause,
+            "append_formula": append_formula,
+        },
+    )
+
+
+def parse_value(value: str):
+    if value in ["true", "false"]:
+        return value == "true"
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def parse_options(options: list[str]) -> list[dict]:
+    """Turns ['a=1,2', 'b=x'] into [{'a': 1, 'b': 'x'}, {'a': 2, 'b': 'x'}]."""
+    names = []
+    values = []
+    for option in options:
+        name, choices = option.split("=")
+        names.append(name)
+        values.append([parse_value(choice) for choice in choices.split(",")])
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+
+args = parser.parse_args()
+
+platform = platforms[args.platform]
+solver_class = counting(type(solvers[args.solver]))
+if isinstance(solvers[args.solver], planning.Solver):
+    raise ValueError(f"Solver '{args.solver}' is a planning solver, not a SAT solver.")
+synthesizer = PhysSynthesizer()
+logger = Logger(0)
+
+header = [
+    "circuit",
+    "options",
+    "depth",
+    "swaps",
+    "gap",
+    "clauses",
+    "variables",
+    "solver time",
+    "total time",
+    "depth times",
+]
+rows = []
+print(" | ".join(header))
+for input in args.inputs:
+    circuit = QuantumCircuit.from_qasm_file(input)
+    if circuit.num_qubits > platform.qubits:
+        print(f"Skipping '{input}': too many qubits for '{args.platform}'.")
+        continue
+    for options in parse_options(args.option):
+        solver = solver_class()
+        output = synthesizer.synthesize(
+            circuit, platform, solver, args.time_limit, logger, **options
+        )
+        options_str = " ".join(f"{name}={value}" for name, value in options.items())
+        match output:
+            case SynthesizerSolution():
+                row = [
+                    input,
+                    options_str,
+                    str(output.depth),
+                    str(output.swaps),
+                    # the gap to the proven lower bound of a solution found before a timeout
+                    f"{output.gap:.3f}" if output.gap is not None else "",
+                    # clauses sent to worker processes are not counted
+                    str(solver.clauses) if solver.clauses else "",
+                    str(solver.nof_vars()) if solver.clauses else "",
+                    f"{output.solver_time:.3f}",
+                    f"{output.total_time:.3f}",
+                    " ".join(
+                        f"{depth}{'✓' if sat else '✗'}{seconds:.3f}"
+                        for depth, sat, seconds in output.depth_times or []
+                    ),
+                ]
+            case _:
+                row = [input, options_str, str(output), "", "", "", "", "", "", ""]
+        solver.delete()
+        rows.append(row)
+        print(" | ".join(row), flush=True)
+
+if args.csv != None:
+    f = open(args.csv, "w")
+    f.write(",".join(header) + "\n")
+    for row in rows:
+        f.write(",".join(f'"{cell}"' for cell in row) + "\n")
+    f.close()
@@ -11,6 +11,7 @@ from synthesizers.planning.local_clock_incremental_planning import (
 from synthesizers.sat.synthesizer import SATSynthesizer
 import synthesizers.sat.synthesizer as sat
 from synthesizers.sat.phys import PhysSynthesizer
+from synthesizers.sat.portfolio import PortfolioSolver
 
 from platforms import (
     TENERIFE,
@@ -75,6 +76,7 @@ solvers: dict[str, Solver | sat.Solver] = {
     "maple_cm": pysat.solvers.MapleCM(),
     "maple_chrono": pysat.solvers.MapleChrono(),
     "minisat22": pysat.solvers.Minisat22(),
+    "portfolio": PortfolioSolver(),
 }
 
 
@@ -1,3 +1,9 @@
+import rustworkx
+
+# The most automorphisms of a platform that are enumerated.
+MAX_AUTOMORPHISMS = 64
+
+
 class Platform:
     def __init__(
         self,
@@ -16,6 +22,73 @@ class Platform:
         self.connectivity_graph = connectivity_graph.union(
             {(j, i) for i, j in connectivity_graph}
         )
+        self._distances: list[list[int]] | None = None
+        self._automorphisms: list[list[int]] | None = None
+
+    @property
+    def distances(self) -> list[list[int]]:
+        """
+        The lengths of the shortest paths between all pairs of physical qubits, found by
+        a breadth-first search from every qubit on first use. Qubits that are not
+        connected are `qubits` apart, which is longer than any path.
+        """
+        if self._distances is None:
+            neighbours: dict[int, list[int]] = {p: [] for p in range(self.qubits)}
+            for p, p_prime in self.connectivity_graph:
+                neighbours[p].append(p_prime)
+
+            self._distances = []
+            for source in range(self.qubits):
+                distance = [self.qubits] * self.qubits
+                distance[source] = 0
+                frontier = [source]
+                while frontier:
+                    next_frontier = []
+                    for p in frontier:
+                        for p_prime in neighbours[p]:
+                            if distance[p_prime] == self.qubits:
+                                distance[p_prime] = distance[p] + 1
+                                next_frontier.append(p_prime)
+                    frontier = next_frontier
+                self._distances.append(distance)
+        return self._distances
+
+    @property
+    def automorphisms(self) -> list[list[int]]:
+        """
+        The automorphisms of the connectivity graph other than the identity, as the
+        image of every physical qubit, enumerated with VF2 on first use. Only the first
+        `MAX_AUTOMORPHISMS` are kept.
+        """
+        if self._automorphisms is None:
+            graph = rustworkx.PyGraph()
+            graph.add_nodes_from(range(self.qubits))
+            graph.add_edges_from_no_data(
+                [(p, p_prime) for p, p_prime in self.connectivity_graph if p < p_prime]
+            )
+            identity = list(range(self.qubits))
+            self._automorphisms = []
+            for mapping in rustworkx.vf2_mapping(graph, graph, id_order=False):
+                permutation = [mapping[p] for p in range(self.qubits)]
+                if permutation != identity:
+                    self._automorphisms.append(permutation)
+                    if len(self._automorphisms) == MAX_AUTOMORPHISMS:
+                        break
+        return self._automorphisms
+
+    def restricted(self, region: list[int]) -> "Platform":
+        """The platform on the given physical qubits, where `region[i]` becomes qubit `i`."""
+        index = {p: i for i, p in enumerate(region)}
+        return Platform(
+            f"{self.name}_region",
+            len(region),
+            {
+                (index[p], index[p_prime])
+                for p, p_prime in self.connectivity_graph
+                if p in index and p_prime in index
+            },
+            description=f"{len(region)} qubits of {self.name}.",
+        )
 
 
 TENERIFE = Platform(
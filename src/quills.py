@@ -20,6 +20,9 @@ from configs import (
 )
 from synthesizers.planning.synthesizer import PlanningSynthesizer
 from synthesizers.sat.synthesizer import SATSynthesizer
+from synthesizers.sat.phys import ENABLED_ENCODINGS, DEPTH_SEARCHES, SWAP_SEARCHES
+from synthesizers.sat.portfolio import PortfolioSolver
+from util.sat import CARDINALITY_POLICIES
 import synthesizers.planning.solvers as planning
 
 BOLD_START = "\033[1m"
@@ -116,6 +119,143 @@ parser.add_argument(
     help="the maximum number of SWAPs to allow in the output circuit (default: -1 -- off)",
 )
 
+parser.add_argument(
+    "-enc",
+    "--enabled_encoding",
+    type=str,
+    choices=ENABLED_ENCODINGS,
+    default="full",
+    help="how the SAT synthesizer encodes CX connectivity (full: forbid every non-edge, support: require a connecting edge) -- default: full",
+)
+
+parser.add_argument(
+    "-mutex",
+    "--gate_mutexes",
+    help=f"whether the SAT synthesizer should add the redundant mutexes between all dependent gates",
+    action="store_true",
+)
+
+parser.add_argument(
+    "-card",
+    "--cardinality_policy",
+    type=str,
+    choices=CARDINALITY_POLICIES.keys(),
+    default="adaptive",
+    help="how the SAT synthesizer encodes exactly-one and at-most-one constraints (adaptive: by the number of atoms, otherwise always the given encoding) -- default: adaptive",
+)
+
+parser.add_argument(
+    "-nocache",
+    "--no_platform_cache",
+    help=f"whether the SAT synthesizer should not cache the clauses of the platform on disk (in $QUILLS_CACHE_DIR, or else ~/.cache/quills)",
+    action="store_true",
+)
+
+parser.add_argument(
+    "-search",
+    "--depth_search",
+    type=str,
+    choices=DEPTH_SEARCHES,
+    default="linear",
+    help="how the SAT synthesizer searches for the optimal depth (linear: one depth after the other, exponential: double the extra layers, then binary search) -- default: linear",
+)
+
+parser.add_argument(
+    "-noroute",
+    "--no_heuristic_router",
+    help=f"whether the SAT synthesizer should not route the circuit greedily first, which bounds the depth, warm-starts the solver and can be returned on timeout",
+    action="store_true",
+)
+
+parser.add_argument(
+    "-workers",
+    "--depth_workers",
+    type=int,
+    default=1,
+    help="the number of worker processes in which the SAT synthesizer probes consecutive depths in parallel, with the linear depth search -- default: 1",
+)
+
+parser.add_argument(
+    "-swapsearch",
+    "--swap_search",
+    type=str,
+    choices=SWAP_SEARCHES,
+    default="bounds",
+    help="how the SAT synthesizer minimizes the number of SWAPs with -swap (bounds: tighten a SWAP bound through assumptions, maxsat: solve with the RC2 MaxSAT solver) -- default: bounds",
+)
+
+parser.add_argument(
+    "-noanytime",
+    "--no_anytime",
+    help=f"whether the SAT synthesizer should report a timeout instead of returning the best solution found before it, with its proven lower bounds",
+    action="store_true",
+)
+
+parser.add_argument(
+    "-sym",
+    "--symmetry_breaking",
+    help=f"whether the SAT synthesizer should break the symmetries of the platform by only searching initial mappings that are lexicographically smallest under its automorphisms",
+    action="store_true",
+)
+
+parser.add_argument(
+    "-noembed",
+    "--no_subgraph_embedding",
+    help=f"whether the SAT synthesizer should not skip the solver when the interaction graph of the circuit embeds in the platform, which needs no SWAPs",
+    action="store_true",
+)
+
+parser.add_argument(
+    "-region",
+    "--region_slack",
+    type=int,
+    default=-1,
+    help="the number of physical qubits beyond the logical qubits in the connected region the SAT synthesizer restricts the platform to, doubled until the solution is proven optimal on the whole platform or a wider region does not improve it (-1: off) -- default: -1",
+)
+
+parser.add_argument(
+    "-window",
+    "--window_layers",
+    type=int,
+    default=0,
+    help="the number of layers of gates the SAT synthesizer solves at a time, each window starting from the final mapping of the previous one (0: the whole circuit at once); this trades quality for speed, as windows are only optimal given their initial mappings, so the result can be much deeper than that of the whole circuit in the same time -- default: 0",
+)
+
+parser.add_argument(
+    "-lookahead",
+    "--lookahead_layers",
+    type=int,
+    help="the number of layers of gates after a window that are solved along with it, only with windows -- default: 5",
+)
+
+parser.add_argument(
+    "-split",
+    "--split_components",
+    help="whether the SAT synthesizer should synthesize groups of logical qubits that never share a CX gate on disjoint regions of the platform, in parallel processes; as each group is only optimal within its region, a result above the lower bounds of the whole platform is solved again jointly in the remaining time",
+    action="store_true",
+)
+
+parser.add_argument(
+    "-blocks",
+    "--unary_blocks",
+    help="whether the SAT synthesizer should encode runs of unary gates on a qubit as single blocks, which keeps the gates of a run together and shrinks the formula, but only proves optimality among the schedules that do",
+    action="store_true",
+)
+
+parser.add_argument(
+    "-commute",
+    "--commutation",
+    help="whether gates that commute may be reordered, e.g. CX gates sharing a control or diagonal gates before a CX control; not with CX-depth optimization",
+    action="store_true",
+)
+
+parser.add_argument(
+    "-nophases",
+    "--no_carried_phases",
+    help="whether the SAT synthesizer should not prefer the mapping of the best assignment found so far when searching the next depth, but only that of the routed circuit; only has an effect with -noroute, -search exponential or -swap",
+    action="store_true",
+)
+
 parser.add_argument(
     "input",
     type=str,
@@ -196,6 +336,98 @@ if args.swap_optimal and not isinstance(synthesizer, SATSynthesizer):
         "Cannot specify SWAP optimization with a planning synthesizer. Please choose a SAT synthesizer."
     )
 
+if args.enabled_encoding != "full" and not isinstance(synthesizer, SATSynthesizer):
+    raise ValueError(
+        "Cannot specify an encoding of CX connectivity with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
+if args.gate_mutexes and not isinstance(synthesizer, SATSynthesizer):
+    raise ValueError(
+        "Cannot specify gate mutexes with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
+if args.cardinality_policy != "adaptive" and not isinstance(
+    synthesizer, SATSynthesizer
+):
+    raise ValueError(
+        "Cannot specify a cardinality policy with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
+if args.no_platform_cache and not isinstance(synthesizer, SATSynthesizer):
+    raise ValueError(
+        "Cannot disable the platform cache with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
+if args.depth_search != "linear" and not isinstance(synthesizer, SATSynthesizer):
+    raise ValueError(
+        "Cannot specify a depth search with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
+if args.no_heuristic_router and not isinstance(synthesizer, SATSynthesizer):
+    raise ValueError(
+        "Cannot disable the heuristic router with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
+if args.depth_workers != 1 and not isinstance(synthesizer, SATSynthesizer):
+    raise ValueError(
+        "Cannot probe depths in parallel with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
+if args.swap_search != "bounds" and not isinstance(synthesizer, SATSynthesizer):
+    raise ValueError(
+        "Cannot specify a SWAP search with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
+if args.no_anytime and not isinstance(synthesizer, SATSynthesizer):
+    raise ValueError(
+        "Cannot disable anytime synthesis with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
+if args.symmetry_breaking and not isinstance(synthesizer, SATSynthesizer):
+    raise ValueError(
+        "Cannot specify symmetry breaking with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
+if args.no_subgraph_embedding and not isinstance(synthesizer, SATSynthesizer):
+    raise ValueError(
+        "Cannot disable the subgraph embedding with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
+if args.region_slack != -1 and not isinstance(synthesizer, SATSynthesizer):
+    raise ValueError(
+        "Cannot restrict the platform to a region with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
+if args.window_layers and not isinstance(synthesizer, SATSynthesizer):
+    raise ValueError(
+        "Cannot synthesize in windows with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
+if args.lookahead_layers is not None and not isinstance(synthesizer, SATSynthesizer):
+    raise ValueError(
+        "Cannot specify look-ahead layers with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
+if args.lookahead_layers is not None and not args.window_layers:
+    raise ValueError(
+        "Cannot specify look-ahead layers without synthesizing in windows. Please specify the number of window layers."
+    )
+
+if args.split_components and not isinstance(synthesizer, SATSynthesizer):
+    raise ValueError(
+        "Cannot split the circuit into components with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
+if args.unary_blocks and not isinstance(synthesizer, SATSynthesizer):
+    raise ValueError(
+        "Cannot encode runs of unary gates as blocks with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
+if args.no_carried_phases and not isinstance(synthesizer, SATSynthesizer):
+    raise ValueError(
+        "Cannot disable carried phases with a planning synthesizer. Please choose a SAT synthesizer."
+    )
+
 if platform.qubits < input_circuit.num_qubits:
     available_platforms = [
         p_str for p_str, p in platforms.items() if p.qubits >= input_circuit.num_qubits
@@ -229,6 +461,8 @@ if isinstance(solver, planning.Solver):
         print(f"'{args.solver}' (optimal): {solver.description}")
     else:
         print(f"'{args.solver}' (satisfying): {solver.description}")
+elif isinstance(solver, PortfolioSolver):
+    print(f"'{args.solver}': races {', '.join(solver.names)} from the pysat library.")
 else:
     print(f"'{args.solver}' from the pysat library.")
 print()
@@ -248,6 +482,7 @@ match synthesizer, solver:
             time_limit,
             logger,
             cx_optimal=args.cx_optimal,
+            commutation=args.commutation,
         )
     case SATSynthesizer(), _ if not isinstance(solver, planning.Solver):
         output = synthesizer.synthesize(
@@ -260,6 +495,26 @@ match synthesizer, solver:
             swap_optimal=args.swap_optimal,
             ancillaries=args.ancillaries,
             swap_bound=args.swap_bound,
+            enabled_encoding=args.enabled_encoding,
+            gate_mutexes=args.gate_mutexes,
+            cardinality_policy=args.cardinality_policy,
+            platform_cache=not args.no_platform_cache,
+            depth_search=args.depth_search,
+            heuristic_router=not args.no_heuristic_router,
+            depth_workers=args.depth_workers,
+            swap_search=args.swap_search,
+            anytime=not args.no_anytime,
+            symmetry_breaking=args.symmetry_breaking,
+            subgraph_embedding=not args.no_subgraph_embedding,
+            region_slack=args.region_slack,
+            window_layers=args.window_layers,
+            lookahead_layers=(
+                5 if args.lookahead_layers is None else args.lookahead_layers
+            ),
+            split_components=args.split_components,
+            unary_blocks=args.unary_blocks,
+            commutation=args.commutation,
+            carried_phases=not args.no_carried_phases,
         )
     case _:
         raise ValueError(
@@ -303,6 +558,7 @@ match output:
             output.circuit,
             output.initial_mapping,
             args.ancillaries,
+            args.commutation,
         )
         if correct_output:
             print("✓ Input and output circuits are equivalent (Proprietary Checker)")
@@ -30,7 +30,7 @@ class ConditionalCostBasedOptimalPlanningSynthesizer(PlanningSynthesizer):
     uses_conditional_effects = True
 
     def create_instance(
-        self, circuit: QuantumCircuit, platform: Platform
+        self, circuit: QuantumCircuit, platform: Platform, commutation: bool = False
     ) -> PDDLInstance:
         num_pqubits = platform.qubits
         num_lqubits = circuit.num_qubits
@@ -140,7 +140,9 @@ class ConditionalCostBasedOptimalPlanningSynthesizer(PlanningSynthesizer):
             return preconditions, effects
 
         gate_line_mapping = gate_line_dependency_mapping(circuit)
-        gate_direct_mapping = gate_direct_dependency_mapping(circuit)
+        # gates that commute are not ordered, and as a qubit is busy for the rest of
+        # the layer after a gate, they are still executed in different layers
+        gate_direct_mapping = gate_direct_dependency_mapping(circuit, commutation)
 
         gate_actions = []
         for gate_id, (gate_type, gate_logical_qubits) in gate_line_mapping.items():
@@ -226,6 +228,7 @@ class ConditionalCostBasedOptimalPlanningSynthesizer(PlanningSynthesizer):
         time_limit_s: int,
         logger: Logger,
         cx_optimal: bool = False,
+        commutation: bool = False,
     ) -> SynthesizerOutput:
 
         min_plan_length = logical_circuit.size()
@@ -243,6 +246,7 @@ class ConditionalCostBasedOptimalPlanningSynthesizer(PlanningSynthesizer):
             min_plan_length,
             max_plan_length,
             cx_optimal,
+            commutation,
         )
 
     def parse_solution(
@@ -28,7 +28,7 @@ class CostBasedOptimalPlanningSynthesizer(PlanningSynthesizer):
     uses_conditional_effects = False
 
     def create_instance(
-        self, circuit: QuantumCircuit, platform: Platform
+        self, circuit: QuantumCircuit, platform: Platform, commutation: bool = False
     ) -> PDDLInstance:
         num_pqubits = platform.qubits
         num_lqubits = circuit.num_qubits
@@ -150,7 +150,9 @@ class CostBasedOptimalPlanningSynthesizer(PlanningSynthesizer):
             return preconditions, effects
 
         gate_line_mapping = gate_line_dependency_mapping(circuit)
-        gate_direct_mapping = gate_direct_dependency_mapping(circuit)
+        # gates that commute are not ordered, and as a qubit is busy for the rest of
+        # the layer after a gate, they are still executed in different layers
+        gate_direct_mapping = gate_direct_dependency_mapping(circuit, commutation)
 
         gate_actions = []
         for gate_id, (gate_type, gate_logical_qubits) in gate_line_mapping.items():
@@ -245,6 +247,7 @@ class CostBasedOptimalPlanningSynthesizer(PlanningSynthesizer):
         time_limit_s: int,
         logger: Logger,
         cx_optimal: bool = False,
+        commutation: bool = False,
     ) -> SynthesizerOutput:
 
         min_plan_length = logical_circuit.size()
@@ -262,6 +265,7 @@ class CostBasedOptimalPlanningSynthesizer(PlanningSynthesizer):
             min_plan_length,
             max_plan_length,
             cx_optimal,
+            commutation,
         )
 
     def parse_solution(
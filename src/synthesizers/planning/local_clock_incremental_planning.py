@@ -355,7 +355,12 @@ class LocalClockIncrementalPlanningSynthesizer(PlanningSynthesizer):
         time_limit_s: int,
         logger: Logger,
         cx_optimal: bool = False,
+        commutation: bool = False,
     ) -> SynthesizerOutput:
+        if commutation:
+            raise ValueError(
+                "The local clock encoding keeps track of depth along the order of the gates on each qubit, so commuting gates cannot be reordered."
+            )
         min_plan_length_lambda = lambda depth: logical_circuit.size()
         max_plan_length_lambda = lambda depth: logical_circuit.num_qubits * depth
         min_layers_lambda = lambda depth: depth
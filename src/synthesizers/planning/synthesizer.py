@@ -15,6 +15,7 @@ from util.logger import Logger
 from util.pddl import PDDLInstance
 from util.circuits import (
     SynthesizerOutput,
+    check_commutation,
     count_swaps,
     gate_line_dependency_mapping,
     LogicalQubit,
@@ -245,6 +246,7 @@ class PlanningSynthesizer(ABC):
         time_limit_s: int,
         logger: Logger,
         cx_optimal: bool = False,
+        commutation: bool = False,
     ) -> SynthesizerOutput:
         """
         Layout synthesis.
@@ -254,6 +256,7 @@ class PlanningSynthesizer(ABC):
         - logical_circuit (`QuantumCircuit`): Logical circuit.
         - platform (`Platform`): The target platform.
         - solver (`Solver`): The underlying solver.
+        - commutation (`bool`): Whether gates that commute may be reordered.
 
         Returns
         --------
@@ -275,8 +278,11 @@ class PlanningSynthesizer(ABC):
         min_layers: int,
         max_layers: int,
         cnot_optimal: bool,
+        commutation: bool = False,
     ) -> SynthesizerOutput:
 
+        check_commutation(commutation, cnot_optimal)
+
         remove_intermediate_files()
 
         circuit = (
@@ -285,7 +291,7 @@ class PlanningSynthesizer(ABC):
             else logical_circuit
         )
         before = time.time()
-        instance = self.create_instance(circuit, platform)
+        instance = self.create_instance(circuit, platform, commutation=commutation)
         domain, problem = instance.compile()
         solution, solver_time = solver.solve(
             domain,
@@ -0,0 +1,52 @@
+from array import array
+from multiprocessing.connection import Connection
+import multiprocessing
+from pysat.examples.rc2 import RC2
+from pysat.formula import WCNF
+from util.sat import Atom
+
+# The pysat solver RC2 runs with. With CaDiCaL, RC2 was several times slower on the
+# benchmarks.
+MAXSAT_SOLVER = "glucose42"
+
+
+def serve(hard: array, soft: list[Atom], name: str, connection: Connection):
+    """Solves a MaxSAT problem with RC2 in a worker process and sends the model."""
+    formula = WCNF()
+    start = 0
+    lits = hard.tolist()
+    for end, lit in enumerate(lits):
+        if lit == 0:
+            formula.append(lits[start:end])
+            start = end + 1
+    for lit in soft:
+        formula.append([lit], weight=1)
+    with RC2(formula, solver=name, adapt=True, exhaust=True, minz=True) as rc2:
+        connection.send(rc2.compute())
+
+
+def maxsat_model(
+    hard: array, soft: list[Atom], timeout: float, name: str = MAXSAT_SOLVER
+) -> list[int] | None:
+    """
+    Returns a model of the hard clauses, given as a flat buffer of 0-terminated
+    clauses like in a `BufferSink`, that satisfies as many of the soft literals as
+    possible, or `None` if the hard clauses are unsatisfiable. RC2 runs with the given
+    pysat solver in a separate process, which is stopped after the timeout, since it
+    cannot be interrupted. Raises a `TimeoutError` then.
+    """
+    if timeout <= 0:
+        raise TimeoutError("Timeout")
+    connection, worker_connection = multiprocessing.Pipe()
+    process = multiprocessing.Process(
+        target=serve, args=(hard, soft, name, worker_connection), daemon=True
+    )
+    process.start()
+    try:
+        if not connection.poll(timeout):
+            raise TimeoutError("Timeout")
+        return connection.recv()
+    finally:
+        process.terminate()
+        process.join()
+        connection.close()
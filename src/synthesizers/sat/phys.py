@@ -1,4 +1,6 @@
 from synthesizers.sat.synthesizer import SATSynthesizer, Solver
+from synthesizers.sat.portfolio import SolverPool
+from synthesizers.sat.maxsat import maxsat_model
 from qiskit import QuantumCircuit, QuantumRegister
 from qiskit.circuit import Qubit
 from platforms import Platform
@@ -14,35 +16,219 @@ from util.circuits import (
     gate_direct_successor_mapping,
     gate_successor_mapping,
     gate_line_dependency_mapping,
+    gate_asap_mapping,
+    gate_alap_mapping,
+    gate_duration_mapping,
     with_swaps_as_cnots,
     remove_all_non_cx_gates,
+    remove_barriers,
     reinsert_unary_gates,
     count_swaps,
-    get_lq_pairs,
+    lq_interaction_mapping,
+    interaction_components,
+    check_commutation,
+    compress_unary_runs,
+    line_commutation_groups,
+    UNARY_BLOCK,
+    SWAP_LAYERS,
 )
+from util.bounds import depth_lower_bound
 from util.logger import Logger
+from util.routing import (
+    RoutedCircuit,
+    connected_region,
+    disjoint_regions,
+    embed,
+    initial_mapping,
+    region_distances,
+    route,
+    route_from,
+)
 from util.sat import (
     Atom,
-    Formula,
+    Block,
+    ClauseSink,
+    SolverSink,
+    BufferSink,
+    RecordingSolver,
+    LayerTemplate,
     parse_sat_solution,
-    exactly_one,
-    at_most_one,
     at_most_n,
+    at_most_counter,
+    lex_leq,
     new_atom,
+    new_block,
+    peek_next_id,
     neg,
-    iff,
-    iff_disj,
     impl,
-    impl_conj,
-    impl_disj,
-    and_,
-    or_,
-    andf,
     reset,
+    set_cardinality_policy,
+    CARDINALITY_POLICIES,
 )
+from pysat.solvers import SolverNames
+from multiprocessing.connection import Connection, wait
+from dataclasses import asdict, dataclass, replace
+import hashlib
+import multiprocessing
+import os
 import time
+import traceback
 from threading import Timer
 
+# How `enabled` atoms are tied to the mapping of their logical qubit pair:
+# - full: mapped to an edge -> enabled, mapped to a non-edge -> not enabled
+# - support: enabled and one qubit mapped to p -> the other is on a neighbour of p
+ENABLED_ENCODINGS = ["full", "support"]
+
+# How the optimal depth is searched for:
+# - linear: one depth after the other, starting from the depth of the circuit
+# - exponential: double the number of extra layers until a solution is found, then
+#   binary search between the last depth without and the first with a solution
+DEPTH_SEARCHES = ["linear", "exponential"]
+
+# How the number of SWAPs is minimized at the optimal depth:
+# - bounds: tighten a bound on a counter over the SWAPs through assumptions
+# - maxsat: hand the formula to the RC2 MaxSAT solver, with a soft clause against
+#   every SWAP
+SWAP_SEARCHES = ["bounds", "maxsat"]
+
+# Version of the clauses written by `encode_platform_layer`. Bump it whenever they
+# change, so that clauses cached by older versions are not used.
+PLATFORM_ENCODING_VERSION = 1
+# the cache lives in the user's cache directory rather than the working directory, so
+# runs from anywhere share it; QUILLS_CACHE_DIR overrides its location
+PLATFORM_CACHE_ENV = "QUILLS_CACHE_DIR"
+
+# Seconds to wait for the workers of components beyond the time limit, as a solver that
+# cannot be interrupted only stops at its next query.
+COMPONENT_GRACE_S = 5
+
+
+def platform_cache_folder() -> str:
+    """The folder holding the cached platform clauses of all configurations."""
+    root = os.environ.get(PLATFORM_CACHE_ENV) or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "quills"
+    )
+    return os.path.join(root, "platform_clauses")
+
+
+def platform_cache_path(
+    platform: Platform, logical_qubits: int, ancillaries: bool, cardinality_policy: str
+) -> str:
+    """The folder holding the cached platform clauses for the given configuration."""
+    edges = ",".join(
+        f"{p}-{p_prime}" for p, p_prime in sorted(platform.connectivity_graph)
+    )
+    digest = hashlib.sha1(edges.encode()).hexdigest()[:12]
+    return os.path.join(
+        platform_cache_folder(),
+        f"{platform.name}_{logical_qubits}_{'anc' if ancillaries else 'noanc'}_{cardinality_policy}_v{PLATFORM_ENCODING_VERSION}_{digest}",
+    )
+
+
+def load_platform_layers(path: str) -> list[LayerTemplate]:
+    """The cached platform clauses of the first layers, memory-mapped."""
+    layers = []
+    while os.path.exists(file := os.path.join(path, f"layer_{len(layers)}.npy")):
+        layers.append(LayerTemplate.load(file))
+    return layers
+
+
+def save_platform_layer(path: str, layer: int, template: LayerTemplate):
+    """Cache the platform clauses of a layer, replacing the file atomically."""
+    os.makedirs(path, exist_ok=True)
+    file = os.path.join(path, f"layer_{layer}.npy")
+    partial_file = os.path.join(path, f"layer_{layer}.{os.getpid()}.npy")
+    template.save(partial_file)
+    os.replace(partial_file, file)
+
+
+@dataclass
+class PhysOptions:
+    """
+    The options of a synthesis (see `SATSynthesizer.synthesize`), which the syntheses on
+    regions, windows and components pass on to the searches they run.
+    """
+
+    cx_optimal: bool
+    swap_optimal: bool
+    ancillaries: bool
+    swap_bound: int
+    enabled_encoding: str
+    gate_mutexes: bool
+    cardinality_policy: str
+    platform_cache: bool
+    depth_search: str
+    heuristic_router: bool
+    depth_workers: int
+    swap_search: str
+    anytime: bool
+    symmetry_breaking: bool
+    subgraph_embedding: bool
+    region_slack: int
+    window_layers: int
+    lookahead_layers: int
+    split_components: bool
+    unary_blocks: bool
+    commutation: bool
+    carried_phases: bool
+
+
+def serve_component(
+    synthesizer: "PhysSynthesizer",
+    circuit: QuantumCircuit,
+    platform: Platform,
+    solver_class: type,
+    deadline: float,
+    options: PhysOptions,
+    connection: Connection,
+):
+    """
+    Synthesizes a component of a circuit in a worker process and sends the output, or
+    the error it failed with, with its traceback.
+    """
+    try:
+        solver = solver_class()
+        output = synthesizer.synthesize(
+            circuit,
+            platform,
+            solver,
+            deadline - time.time(),
+            Logger(0),
+            **asdict(options),
+        )
+        solver.delete()
+    except Exception as e:
+        output = RuntimeError("".join(traceback.format_exception(e)))
+    connection.send(output)
+
+
+class Incumbent:
+    """
+    The best solution found so far, as the names of its true atoms, and what has been
+    proven about the optimum, so that the search can be cut off at any time. Depths are
+    numbers of layers.
+    """
+
+    def __init__(self, routed: RoutedCircuit | None):
+        self.solution = None if routed is None else routed.solution()
+        self.depth = None if routed is None else routed.depth
+        self.depth_lower_bound = 0
+        self.swap_lower_bound = 0
+        # the solver time until the depth was proven optimal
+        self.depth_time: float | None = None
+        # every depth searched, whether it has a solution and the solver time it took
+        self.depth_times: list[tuple[int, bool, float]] = []
+
+    def found(self, solution: list[str], depth: int):
+        """Keeps a solution unless a shallower one is known."""
+        if self.depth is None or depth <= self.depth:
+            self.solution, self.depth = solution, depth
+
+    def refuted(self, depth: int):
+        """Records that there is no solution of the given depth, nor of any smaller."""
+        self.depth_lower_bound = max(self.depth_lower_bound, depth + 1)
+
 
 class PhysSynthesizer(SATSynthesizer):
     description = "Incremental SAT-based synthesizer."
@@ -131,13 +317,16 @@ class PhysSynthesizer(SATSynthesizer):
             if isinstance(instr, Gate):
                 gate = original_circuit.data[instr.id]
 
-                remapped_gate = gate.replace(
-                    qubits=[
-                        Qubit(register, mapping[instr.level][LogicalQubit(q._index)].id)
-                        for q in gate.qubits
-                    ]
-                )
-                circuit.append(remapped_gate)
+                qubits = [
+                    Qubit(register, mapping[instr.level][LogicalQubit(q._index)].id)
+                    for q in gate.qubits
+                ]
+                if gate.operation.name == UNARY_BLOCK:
+                    # the qubit is not swapped while the gates of a block run
+                    for unary in gate.operation.definition.data:
+                        circuit.append(unary.operation, qubits)
+                else:
+                    circuit.append(gate.replace(qubits=qubits))
             elif isinstance(instr, Swap):
                 circuit.swap(instr.p, instr.p_prime)
             else:
@@ -156,14 +345,35 @@ class PhysSynthesizer(SATSynthesizer):
         ancillaries: bool,
         time_limit_s: int,
         swap_bound: int,
+        enabled_encoding: str,
+        gate_mutexes: bool,
+        cardinality_policy: str,
+        platform_cache: bool,
+        depth_search: str,
+        routed: RoutedCircuit | None,
+        depth_workers: int,
+        swap_search: str,
+        incumbent: Incumbent,
+        symmetry_breaking: bool,
+        fixed_mapping: list[int] | None = None,
+        initial_region: list[int] | None = None,
+        commutation: bool = False,
+        carried_phases: bool = True,
     ) -> tuple[list[str], float, tuple[float, float] | None] | None:
         reset()
+        set_cardinality_policy(cardinality_policy)
+        if swap_optimal and swap_search == "maxsat":
+            # the formula is handed to the MaxSAT solver once the depth is found
+            solver = RecordingSolver(solver)
+        sink = SolverSink(solver)
 
         logger.log(1, "\nSearched: ", end="", flush=True)
         overall_time = 0
 
-        circuit_depth = logical_circuit.depth()
         max_depth = logical_circuit.size() * (1 + platform.qubits) + 1
+        # the routed circuit is a solution of its depth, so no deeper one is searched
+        if routed is not None:
+            max_depth = min(max_depth, routed.depth - 1)
         lq = [i for i in range(logical_circuit.num_qubits)]
         pq = [i for i in range(platform.qubits)]
         connectivity_graph = platform.connectivity_graph
@@ -173,408 +383,652 @@ class PhysSynthesizer(SATSynthesizer):
             for p_prime in pq
             if (p, p_prime) not in connectivity_graph
         }
-        conn_dict: dict[int, tuple[list[int], list[int]]] = {
-            p: (
-                [
-                    p_prime
-                    for p_prime in pq
-                    if p_prime < p and (p, p_prime) in connectivity_graph
-                ],
-                [
-                    p_prime
-                    for p_prime in pq
-                    if p < p_prime and (p, p_prime) in connectivity_graph
-                ],
-            )
-            for p in pq
-        }
+        neighbours: dict[int, list[int]] = {p: [] for p in pq}
+        for p, p_prime in connectivity_graph:
+            neighbours[p].append(p_prime)
 
         gate_line_map = gate_line_dependency_mapping(logical_circuit)
         gates = list(gate_line_map.keys())
 
-        gate_full_pre_map = gate_dependency_mapping(logical_circuit)
-        gate_direct_pre_map = gate_direct_dependency_mapping(logical_circuit)
-        gate_full_suc_map = gate_successor_mapping(logical_circuit)
-        gate_direct_suc_map = gate_direct_successor_mapping(logical_circuit)
-
-        lq_pairs = get_lq_pairs(logical_circuit)
-
-        mapped: dict[int, dict[int, dict[int, Atom]]] = {}
-        occupied: dict[int, dict[int, Atom]] = {}
-        enabled: dict[int, dict[tuple[int, int], Atom]] = {}
-        current: dict[int, dict[int, Atom]] = {}
-        advanced: dict[int, dict[int, Atom]] = {}
-        delayed: dict[int, dict[int, Atom]] = {}
-        usable: dict[int, dict[int, Atom]] = {}
-        swap: dict[int, dict[tuple[int, int], Atom]] = {}
-        swapping: dict[int, dict[int, Atom]] = {}
+        gate_direct_pre_map = gate_direct_dependency_mapping(
+            logical_circuit, commutation
+        )
+        gate_direct_suc_map = gate_direct_successor_mapping(
+            logical_circuit, commutation
+        )
+        # precedence over direct edges already implies that no two dependent gates
+        # are current at once, so the full mutexes are only an optional strengthening
+        if gate_mutexes:
+            gate_full_pre_map = gate_dependency_mapping(logical_circuit, commutation)
+            gate_full_suc_map = gate_successor_mapping(logical_circuit, commutation)
+        else:
+            gate_full_pre_map = {g: [] for g in gate_direct_pre_map}
+            gate_full_suc_map = {g: [] for g in gate_direct_suc_map}
+        # gates that commute on a qubit are not ordered, but cannot share a layer
+        gate_line_mutexes: dict[int, list[int]] = {g: [] for g in gate_direct_pre_map}
+        for groups in line_commutation_groups(logical_circuit, commutation).values():
+            for group in groups:
+                for i, g in enumerate(group):
+                    gate_line_mutexes[g].extend(group[i + 1 :])
+
+        # a gate cannot start before its earliest layer, so up to then it is delayed
+        # and its atoms are left out; its latest layer depends on the depth searched.
+        # A block of unary gates is current in its first layer and keeps its qubit
+        # busy for as many layers as it holds gates
+        gate_asap = gate_asap_mapping(logical_circuit, commutation)
+        gate_alap = gate_alap_mapping(logical_circuit, commutation=commutation)
+        gate_durations = gate_duration_mapping(logical_circuit)
+        last_layer = max(
+            (gate_asap[g] + gate_durations[g] - 1 for g in gate_asap), default=0
+        )
+
+        # unordered pairs of logical qubits sharing a CX gate, their CX gates and
+        # the earliest layers of the first and last of them
+        lq_interactions = lq_interaction_mapping(logical_circuit, commutation)
+        # the pairs in the order their first CX gates can be pending, so that the pairs
+        # of every layer are a prefix of it
+        pair_index = {
+            pair: i
+            for i, pair in enumerate(
+                sorted(lq_interactions, key=lambda pair: lq_interactions[pair][1])
+            )
+        }
+        edge_index = {
+            edge: i
+            for i, edge in enumerate(
+                sorted((p, p_prime) for p, p_prime in connectivity_graph if p < p_prime)
+            )
+        }
+        incident_edges: dict[int, list[tuple[int, int]]] = {p: [] for p in pq}
+        for p, p_prime in edge_index:
+            incident_edges[p].append((p, p_prime))
+            incident_edges[p_prime].append((p, p_prime))
+
+        # every layer is one contiguous range of atoms, with a block per variable
+        # family, so atoms are found by index arithmetic rather than by name; the
+        # platform blocks and their auxiliary atoms come first
+        mapped: dict[int, Block] = {}
+        occupied: dict[int, Block] = {}
+        enabled: dict[int, Block] = {}
+        current: dict[int, Block] = {}
+        advanced: dict[int, Block] = {}
+        delayed: dict[int, Block] = {}
+        usable: dict[int, Block] = {}
+        swap: dict[int, Block] = {}
+        swapping: dict[int, Block] = {}
         assumption: dict[int, Atom] = {}
 
         previous_swap_asms: list[Atom] = []
 
-        for t in range(max_depth + 1):
-            mapped[t] = {l: {p: new_atom(f"m^{t}_{l};{p}") for p in pq} for l in lq}
-            occupied[t] = {p: new_atom() for p in pq}
-            enabled[t] = {(l, l_prime): new_atom() for l, l_prime in lq_pairs}
-            current[t] = {g: new_atom(f"c^{t}_{g}") for g in gates}
-            advanced[t] = {g: new_atom() for g in gates}
-            delayed[t] = {g: new_atom() for g in gates}
-            usable[t] = {p: new_atom() for p in pq}
-            swap[t] = {
-                (p, p_prime): new_atom(f"s^{t}_{p};{p_prime}")
-                for p, p_prime in connectivity_graph
-                if p < p_prime
-            }
-            swapping[t] = {p: new_atom() for p in pq}
-            assumption[t] = new_atom()
+        # the clauses of a layer that only depend on the platform: mappings,
+        # occupancy and swaps
+        def encode_platform_layer(t: int, sink: ClauseSink):
+            # rows of the mapped blocks, so that mapped^t_l;p is mapped_rows[l][p]
+            mapped_rows = [mapped[t][l] for l in lq]
+            if t > 0:
+                prev_mapped_rows = [mapped[t - 1][l] for l in lq]
 
             # mappings and occupancy
             for l in lq:
-                solver.append_formula(exactly_one([mapped[t][l][p] for p in pq]))
+                sink.exactly_one(mapped_rows[l])
             for p in pq:
-                solver.append_formula(at_most_one([mapped[t][l][p] for l in lq]))
+                sink.at_most_one([mapped_rows[l][p] for l in lq])
             for p in pq:
-                solver.append_formula(
-                    iff_disj([mapped[t][l][p] for l in lq], occupied[t][p])
-                )
+                sink.iff_disj([mapped_rows[l][p] for l in lq], occupied[t][p])
+
+            # swap stuff
+            if t > 0:
+                for p in pq:
+                    swaps_at_p = [swap[t][edge] for edge in incident_edges[p]]
+                    sink.iff_disj(swaps_at_p, swapping[t][p])
+                    if t >= SWAP_LAYERS - 1:
+                        # a SWAP occupies its qubits in its layer and the ones before
+                        occupying = range(t, t - SWAP_LAYERS, -1)
+                        sink.at_most_one(
+                            [
+                                swap[t_prime][edge]
+                                for t_prime in occupying
+                                for edge in incident_edges[p]
+                            ]
+                        )
+                        for t_prime in occupying:
+                            sink.clause(-swapping[t][p], -usable[t_prime][p])
+                    # ~swapping -> (mapped^{t-1} <-> mapped^t)
+                    swapping_atom = swapping[t][p]
+                    for l in lq:
+                        before, after = prev_mapped_rows[l][p], mapped_rows[l][p]
+                        sink.clause(swapping_atom, -before, after)
+                        sink.clause(swapping_atom, before, -after)
+                for p, p_prime in edge_index:
+                    swap_atom = swap[t][p, p_prime]
+                    # swap -> (mapped^{t-1} at p <-> mapped^t at p' and vice versa)
+                    for l in lq:
+                        before_p = prev_mapped_rows[l][p]
+                        before_p_prime = prev_mapped_rows[l][p_prime]
+                        after_p = mapped_rows[l][p]
+                        after_p_prime = mapped_rows[l][p_prime]
+                        sink.clause(-swap_atom, -before_p, after_p_prime)
+                        sink.clause(-swap_atom, before_p, -after_p_prime)
+                        sink.clause(-swap_atom, -before_p_prime, after_p)
+                        sink.clause(-swap_atom, before_p_prime, -after_p)
+
+                    if ancillaries:
+                        sink.clause(-swap_atom, occupied[t][p], occupied[t][p_prime])
+                    else:
+                        sink.impl(swap_atom, occupied[t][p])
+                        sink.impl(swap_atom, occupied[t][p_prime])
+
+            # init
+            if t <= 2:
+                for s in swap[t].atoms():
+                    sink.clause(-s)
+
+        # the clauses of a layer that depend on the gates of the circuit
+        def encode_circuit_layer(t: int, sink: ClauseSink):
+            # rows of the mapped blocks, so that mapped^t_l;p is mapped_rows[l][p]
+            mapped_rows = [mapped[t][l] for l in lq]
 
             # cnot connections
-            for l, l_prime in lq_pairs:
+            for (l, l_prime), (_, first_layer, _) in lq_interactions.items():
+                # no CX on the pair can be pending before its first layer
+                if t < first_layer:
+                    continue
+                enabled_atom = enabled[t][l, l_prime]
+                row, row_prime = mapped_rows[l], mapped_rows[l_prime]
                 for p, p_prime in connectivity_graph:
-                    solver.append_formula(
-                        impl_conj(
-                            [mapped[t][l][p], mapped[t][l_prime][p_prime]],
-                            [[enabled[t][l, l_prime]]],
-                        )
-                    )
-                for p, p_prime in inv_connectivity_graph:
-                    solver.append_formula(
-                        impl_conj(
-                            [mapped[t][l][p], mapped[t][l_prime][p_prime]],
-                            [[neg(enabled[t][l, l_prime])]],
+                    sink.clause(-row[p], -row_prime[p_prime], enabled_atom)
+                if enabled_encoding == "support":
+                    # a CX may only fire if some edge carries both qubits
+                    for p in pq:
+                        sink.clause(
+                            -enabled_atom,
+                            -row[p],
+                            *[row_prime[p_prime] for p_prime in neighbours[p]],
                         )
-                    )
+                else:
+                    for p, p_prime in inv_connectivity_graph:
+                        sink.clause(-row[p], -row_prime[p_prime], -enabled_atom)
 
             # gate stuff
             for g in gates:
-                solver.append_formula(
-                    exactly_one([current[t][g], advanced[t][g], delayed[t][g]])
-                )
+                current_atom = current[t][g]
+                if t < gate_asap[g]:
+                    # only the current atom is read back from the model
+                    sink.clause(-current_atom)
+                    continue
+                advanced_atom = advanced[t][g]
+                delayed_atom = delayed[t][g]
+                sink.exactly_one((current_atom, advanced_atom, delayed_atom))
 
-                for g_prime in gate_direct_suc_map[g]:
-                    solver.append_formula(
-                        impl_disj([current[t][g], delayed[t][g]], delayed[t][g_prime])
-                    )
+                # successors before their earliest layer are delayed anyway
+                if gate_durations[g] == 1:
+                    for g_prime in gate_direct_suc_map[g]:
+                        if t >= gate_asap[g_prime]:
+                            sink.impl_disj(
+                                (current_atom, delayed_atom), delayed[t][g_prime]
+                            )
+                # a gate waits until the blocks it depends on are done
+                for g_prime in gate_direct_pre_map[g]:
+                    if gate_durations[g_prime] > 1:
+                        start = t - gate_durations[g_prime] + 1
+                        sink.impl_disj(
+                            (current[start][g_prime], delayed[start][g_prime]),
+                            delayed_atom,
+                        )
                 for g_prime in gate_full_suc_map[g]:
-                    solver.append_formula(
-                        impl(current[t][g], [[neg(current[t][g_prime])]])
-                    )
+                    if t >= gate_asap[g_prime]:
+                        sink.clause(-current_atom, -current[t][g_prime])
                 for g_prime in gate_direct_pre_map[g]:
-                    solver.append_formula(
-                        impl_disj([current[t][g], advanced[t][g]], advanced[t][g_prime])
+                    sink.impl_disj(
+                        (current_atom, advanced_atom),
+                        advanced[t - gate_durations[g_prime] + 1][g_prime],
                     )
                 for g_prime in gate_full_pre_map[g]:
-                    solver.append_formula(
-                        impl(current[t][g], [[neg(current[t][g_prime])]])
-                    )
-                if t > 0:
-                    solver.append_formula(
-                        iff_disj(
-                            [current[t - 1][g], advanced[t - 1][g]],
-                            advanced[t][g],
-                        )
-                    )
-                    solver.append_formula(
-                        iff_disj([current[t][g], delayed[t][g]], delayed[t - 1][g])
+                    sink.clause(-current_atom, -current[t][g_prime])
+                for g_prime in gate_line_mutexes[g]:
+                    if t >= gate_asap[g_prime]:
+                        sink.clause(-current_atom, -current[t][g_prime])
+                if t == gate_asap[g]:
+                    sink.clause(-advanced_atom)
+                else:
+                    sink.iff_disj(
+                        (current[t - 1][g], advanced[t - 1][g]), advanced_atom
                     )
+                    sink.iff_disj((current_atom, delayed_atom), delayed[t - 1][g])
 
+                # current -> (mapped -> usable) on every line of the gate
                 gate_name, lq_deps = gate_line_map[g]
                 if gate_name.startswith("cx"):
-                    solver.append_formula(
-                        impl(
-                            current[t][g],
-                            [[enabled[t][lq_deps[0], lq_deps[1]]]],
-                        )
-                    )
-
-                    for p in pq:
-                        solver.append_formula(
-                            impl(
-                                current[t][g],
-                                impl(mapped[t][lq_deps[0]][p], [[usable[t][p]]]),
-                            )
-                        )
-                        solver.append_formula(
-                            impl(
-                                current[t][g],
-                                impl(mapped[t][lq_deps[1]][p], [[usable[t][p]]]),
-                            )
-                        )
-                else:
+                    pair = (min(lq_deps), max(lq_deps))
+                    sink.impl(current_atom, enabled[t][pair])
+                for l in lq_deps:
                     for p in pq:
-                        solver.append_formula(
-                            impl(
-                                current[t][g],
-                                impl(mapped[t][lq_deps[0]][p], [[usable[t][p]]]),
+                        sink.clause(-current_atom, -mapped_rows[l][p], usable[t][p])
+                # a block started in one of the previous layers is still running
+                if gate_durations[g] > 1:
+                    start = t - gate_durations[g] + 1
+                    done = [advanced[start][g]] if start > gate_asap[g] else []
+                    for l in lq_deps:
+                        for p in pq:
+                            sink.clause(
+                                -advanced_atom, *done, -mapped_rows[l][p], usable[t][p]
                             )
-                        )
 
-            # swap stuff
-            if t > 0:
-                for p in pq:
-                    solver.append_formula(
-                        iff_disj(
-                            [swap[t][p_prime, p] for p_prime in conn_dict[p][0]]
-                            + [swap[t][p, p_prime] for p_prime in conn_dict[p][1]],
-                            swapping[t][p],
-                        )
-                    )
-                    if t > 1:
-                        solver.append_formula(
-                            at_most_one(
-                                [swap[t][p_prime, p] for p_prime in conn_dict[p][0]]
-                                + [swap[t][p, p_prime] for p_prime in conn_dict[p][1]]
-                                + [
-                                    swap[t - 1][p_prime, p]
-                                    for p_prime in conn_dict[p][0]
-                                ]
-                                + [
-                                    swap[t - 1][p, p_prime]
-                                    for p_prime in conn_dict[p][1]
-                                ]
-                                + [
-                                    swap[t - 2][p_prime, p]
-                                    for p_prime in conn_dict[p][0]
-                                ]
-                                + [
-                                    swap[t - 2][p, p_prime]
-                                    for p_prime in conn_dict[p][1]
-                                ],
-                            )
-                        )
-                        for t_prime in [t, t - 1, t - 2]:
-                            solver.append_formula(
-                                impl(
-                                    swapping[t][p],
-                                    [[neg(usable[t_prime][p])]],
-                                )
-                            )
-                    for l in lq:
-                        solver.append_formula(
-                            impl(
-                                neg(swapping[t][p]),
-                                iff(mapped[t - 1][l][p], mapped[t][l][p]),
-                            )
-                        )
-                for p, p_prime in connectivity_graph:
-                    if p < p_prime:
-                        for l in lq:
-                            solver.append_formula(
-                                impl(
-                                    swap[t][p, p_prime],
-                                    andf(
-                                        iff(mapped[t - 1][l][p], mapped[t][l][p_prime]),
-                                        iff(mapped[t - 1][l][p_prime], mapped[t][l][p]),
-                                    ),
-                                )
-                            )
+            # goal
+            if t < last_layer:
+                sink.clause(-assumption[t])
+            else:
+                for d in delayed[t].atoms():
+                    sink.clause(-assumption[t], -d)
+                # with depth t + 1, every gate is done by its latest layer
+                for g in gates:
+                    latest = gate_alap[g] + t - last_layer
+                    sink.clause(-assumption[t], -delayed[latest][g])
 
-                        if ancillaries:
-                            solver.append_formula(
-                                impl(
-                                    swap[t][p, p_prime],
-                                    or_(occupied[t][p], occupied[t][p_prime]),
-                                )
-                            )
-                        else:
-                            solver.append_formula(
-                                impl(
-                                    swap[t][p, p_prime],
-                                    and_(occupied[t][p], occupied[t][p_prime]),
-                                )
-                            )
+        # the platform clauses of a layer only refer to the platform blocks at the
+        # start of this and the layers a SWAP spans before it, and from then on they
+        # are the same over shifted atoms, so they are recorded (or loaded from the
+        # cache) once for the first layers and replayed for the others
+        steady_layer = SWAP_LAYERS
+        cache_path = platform_cache_path(
+            platform, len(lq), ancillaries, cardinality_policy
+        )
+        platform_layers = load_platform_layers(cache_path) if platform_cache else []
+        layer_starts: list[Atom] = []
 
-            # init
-            if t == 0:
-                solver.append_formula(and_(*[neg(advanced[0][g]) for g in gates]))
-                solver.append_formula(
-                    and_(
-                        *[
-                            neg(swap[0][p, p_prime])
-                            for p, p_prime in connectivity_graph
-                            if p < p_prime
-                        ],
-                    )
-                )
-            if t == 1:
-                solver.append_formula(
-                    and_(
-                        *[
-                            neg(swap[1][p, p_prime])
-                            for p, p_prime in connectivity_graph
-                            if p < p_prime
-                        ],
-                    )
+        # the mapping per layer of the best assignment known, whose mapped atoms the
+        # solver prefers: the routed circuit, else the given initial mapping or the
+        # placement of the router, and once a depth has a solution, that solution. With
+        # carried phases, the layers after its last mapping prefer that mapping too,
+        # which only happens without a routed circuit, as its mappings cover every
+        # depth searched
+        phase_mappings: list[list[int]] = []
+        if routed is not None:
+            phase_mappings = list(routed.mappings)
+        elif carried_phases and fixed_mapping is not None:
+            phase_mappings = [fixed_mapping]
+        elif carried_phases:
+            region = initial_region or connected_region(platform, len(lq))
+            if region is not None:
+                # the neighbours of the encoding cover the whole platform, so the
+                # router's are kept apart
+                region_neighbours, distances = region_distances(platform, region)
+                placement = initial_mapping(
+                    logical_circuit, region, region_neighbours, distances
                 )
-            if t == 2:
-                solver.append_formula(
-                    and_(
-                        *[
-                            neg(swap[2][p, p_prime])
-                            for p, p_prime in connectivity_graph
-                            if p < p_prime
-                        ],
+                if symmetry_breaking:
+                    # the image that agrees with the symmetry breaking clauses
+                    placement = max(
+                        [placement]
+                        + [[a[p] for p in placement] for a in platform.automorphisms]
                     )
+                phase_mappings = [placement]
+
+        # the phases of a solution only matter to the queries after it: the smaller
+        # depths of the exponential search and the SWAP optimization. A linear search
+        # and the probes of the depth workers stop at their first solution
+        carry_solutions = carried_phases and (
+            (depth_workers == 1 and depth_search != "linear")
+            or (swap_optimal and swap_search != "maxsat")
+        )
+
+        def add_layer(t: int):
+            layer_starts.append(peek_next_id())
+            mapped[t] = new_block(f"m^{t}", len(lq), len(pq))
+            occupied[t] = new_block("", len(pq))
+            usable[t] = new_block("", len(pq))
+            swap[t] = new_block(f"s^{t}", len(edge_index), keys=edge_index)
+            swapping[t] = new_block("", len(pq))
+
+            layer = min(t, steady_layer)
+            if layer < len(platform_layers):
+                template = platform_layers[layer]
+                # the auxiliary atoms of the recorded layer
+                new_block("", template.width - (peek_next_id() - layer_starts[t]))
+                sink.formula(template.replay(layer_starts, t))
+            else:
+                buffer = BufferSink()
+                encode_platform_layer(t, buffer)
+                template = LayerTemplate.record(
+                    buffer.buffer, layer_starts, t, peek_next_id() - layer_starts[t]
                 )
+                buffer.flush(solver)
+                platform_layers.append(template)
+                if platform_cache:
+                    save_platform_layer(cache_path, layer, template)
 
-            # goal
-            solver.append_formula(
-                impl(assumption[t], and_(*[neg(delayed[t][g]) for g in gates]))
+            # only the pairs whose CX gates can be pending by layer t get enabled atoms
+            pending_pairs = sum(
+                1 for _, first_layer, _ in lq_interactions.values() if first_layer <= t
             )
+            enabled[t] = new_block("", pending_pairs, keys=pair_index)
+            current[t] = new_block(f"c^{t}", len(gates))
+            advanced[t] = new_block("", len(gates))
+            delayed[t] = new_block("", len(gates))
+            assumption[t] = new_atom()
+            encode_circuit_layer(t, sink)
+            if t == 0 and symmetry_breaking:
+                break_symmetries()
+            if t == 0 and fixed_mapping is not None:
+                for l in lq:
+                    sink.clause(mapped[0][l][fixed_mapping[l]])
+            if t == 0 and initial_region is not None:
+                for p in set(pq) - set(initial_region):
+                    sink.clause(-occupied[0][p])
+            if t < len(phase_mappings) or (carried_phases and phase_mappings):
+                solver.set_phases(mapping_phases(t))
+
+        def break_symmetries():
+            """
+            An automorphism of the platform maps every solution to another one, so only
+            initial mappings that are lexicographically at most their images are
+            searched, in the order of the mapped atoms.
+            """
+            atoms = [mapped[0][l][p] for l in lq for p in pq]
+            for automorphism in platform.automorphisms:
+                images = [mapped[0][l][automorphism[p]] for l in lq for p in pq]
+                sink.formula(lex_leq(atoms, images))
+
+        def mapping_phases(t: int) -> list[Atom]:
+            """
+            The mapping of layer t in the best assignment known, or its last mapping for
+            the layers after it. Gates and SWAPs are not used, as the schedule of the
+            routed circuit is usually longer than the depths searched.
+            """
+            mapping = phase_mappings[min(t, len(phase_mappings) - 1)]
+            return [
+                mapped[t][l][p] if mapping[l] == p else neg(mapped[t][l][p])
+                for l in lq
+                for p in pq
+            ]
+
+        def carry_phases(solution: list[str]):
+            """
+            Prefers the mappings of a solution in every layer encoded so far, so that
+            the next depth searched starts from it rather than from the routed circuit.
+            """
+            mappings: dict[int, list[int]] = {}
+            for name in solution:
+                if name.startswith("m^"):
+                    layer, qubits = name[2:].split("_")
+                    l, p = qubits.split(";")
+                    mappings.setdefault(int(layer), [0] * len(lq))[int(l)] = int(p)
+            phase_mappings[:] = [mappings[t] for t in sorted(mappings)]
+            for t in range(len(layer_starts)):
+                solver.set_phases(mapping_phases(t))
 
-            # assumptions
+        def depth_assumptions(t: int) -> list[Atom]:
             asm = [neg(assumption[t_prime]) for t_prime in range(t)]
             asm.append(assumption[t])
+            return asm
 
-            if t >= circuit_depth - 1:
-                if swap_bound != -1:
-                    swap_asm = new_atom()
-                    swap_asm_constraint = impl(
-                        swap_asm,
-                        at_most_n(
-                            swap_bound,
-                            [
-                                swap[t][p, p_prime]
-                                for t in range(t + 1)
-                                for p, p_prime in connectivity_graph
-                                if p < p_prime
-                            ],
-                        ),
-                    )
-                    solver.append_formula(swap_asm_constraint)
-
-                assumptions = (
-                    asm + [neg(asm) for asm in previous_swap_asms] + [swap_asm]
-                    if swap_bound != -1
-                    else asm
-                )
+        # the time a solver pool spent starting its workers and forwarding clauses and
+        # phases to them (see `SolverPool`) that is already counted as solver time
+        charged_overhead = 0.0
 
-                if swap_bound != -1:
-                    previous_swap_asms.append(swap_asm)
+        def uncharged_overhead() -> float:
+            nonlocal charged_overhead
+            overhead = getattr(solver, "overhead", 0.0) - charged_overhead
+            charged_overhead += overhead
+            return overhead
 
-                timer = Timer(time_limit_s - overall_time, solver.interrupt)
+        def solve(t: int, assumptions: list[Atom]) -> tuple[list[str] | None, float]:
+            """
+            Solves for depth t + 1, returning the solution and the time it took, including
+            the time a solver pool spent outside of queries since the previous one.
+            """
+            overhead = uncharged_overhead()
+            budget = time_limit_s - overall_time - overhead
+            before = time.time()
+            if depth_workers > 1:
+                query = solver.submit(assumptions)
+                reply = solver.receive(budget)
+                if reply is None:
+                    solver.cancel(query)
+                    raise TimeoutError("Timeout")
+                _, _, res, model = reply
+            else:
+                timer = Timer(budget, solver.interrupt)
                 timer.start()
-
-                before = time.time()
                 res = solver.solve_limited(
                     assumptions=assumptions, expect_interrupt=True
                 )
-                after = time.time()
                 timer.cancel()
+                model = solver.get_model()
+            after = time.time()
+            # the pool time during the query is part of it
+            uncharged_overhead()
 
-                if res == None:
-                    raise TimeoutError("Timeout")
+            if res == None:
+                raise TimeoutError("Timeout")
 
-                overall_time += after - before
-                model = solver.get_model()
-                solution = parse_sat_solution(model)
+            return parse_sat_solution(model, layer_end(t)), after - before + overhead
+
+        def layer_end(t: int) -> Atom | None:
+            """
+            The first atom after layer t. Layers after t may be encoded already, but are
+            not part of a solution for depth t + 1.
+            """
+            return layer_starts[t + 1] if t + 1 < len(layer_starts) else None
+
+        def depth_query(t: int) -> list[Atom]:
+            """The assumptions for depth t + 1, including the SWAP bound if given."""
+            asm = depth_assumptions(t)
+            if swap_bound != -1:
+                swap_asm = new_atom()
+                swap_asm_constraint = impl(
+                    swap_asm,
+                    at_most_n(
+                        swap_bound,
+                        [s for t in range(t + 1) for s in swap[t].atoms()],
+                    ),
+                )
+                sink.formula(swap_asm_constraint)
+                assumptions = (
+                    asm + [neg(asm) for asm in previous_swap_asms] + [swap_asm]
+                )
+                previous_swap_asms.append(swap_asm)
+            else:
+                assumptions = asm
+            return assumptions
+
+        def solve_depth(t: int) -> list[str] | None:
+            nonlocal overall_time
+            solution, solve_time = solve(t, depth_query(t))
+            overall_time += solve_time
+            incumbent.depth_times.append((t + 1, bool(solution), solve_time))
+            if solution:
+                incumbent.found(solution, t + 1)
+                if carry_solutions:
+                    carry_phases(solution)
+            else:
+                incumbent.refuted(t + 1)
+            logger.log(
+                1,
+                f"{'CX-' if cx_optimal else ''}depth {t+1} ({solve_time:.3f}s)",
+                flush=True,
+                end=", ",
+            )
+            return solution
+
+        def probe_depths(first: int) -> tuple[list[str], int] | None:
+            """
+            Probes consecutive depths in parallel, one per worker, and returns the
+            solution of the smallest depth with one and its layer. A depth is only
+            accepted once all smaller depths are known to have no solution, and depths
+            larger than one with a solution are cancelled.
+            """
+            nonlocal overall_time
+            overall_time += uncharged_overhead()
+            before = time.time()
+            probes: dict[int, int] = {}
+            submitted: dict[int, float] = {}
+            unsat: set[int] = set()
+            best: tuple[int, list[str]] | None = None
+            next_t = first
+            while best is None or any(t not in unsat for t in range(first, best[0])):
+                while (
+                    len(probes) < depth_workers
+                    and next_t <= max_depth
+                    and (best is None or next_t < best[0])
+                ):
+                    while len(layer_starts) <= next_t:
+                        add_layer(len(layer_starts))
+                    query = solver.submit(depth_query(next_t))
+                    probes[query], submitted[query] = next_t, time.time()
+                    next_t += 1
+                if not probes:
+                    return None
+
+                elapsed = time.time() - before
+                reply = solver.receive(time_limit_s - overall_time - elapsed)
+                if reply is None or reply[2] is None:
+                    for query in probes:
+                        solver.cancel(query)
+                    raise TimeoutError("Timeout")
+                query, _, res, model = reply
+                t = probes.pop(query)
+                probe_time = time.time() - submitted[query]
+                incumbent.depth_times.append((t + 1, res, probe_time))
                 logger.log(
-                    1, f"{'CX-' if cx_optimal else ''}depth {t+1}", flush=True, end=", "
+                    1,
+                    f"{'CX-' if cx_optimal else ''}depth {t+1} {'✓' if res else '✗'} ({probe_time:.3f}s)",
+                    flush=True,
+                    end=", ",
                 )
+                if not res:
+                    unsat.add(t)
+                    incumbent.refuted(t + 1)
+                    continue
+                best = (t, parse_sat_solution(model, layer_end(t)))
+                incumbent.found(best[1], t + 1)
+                if carry_solutions:
+                    carry_phases(best[1])
+                for query, t_prime in list(probes.items()):
+                    if t_prime > t:
+                        solver.cancel(query)
+                        del probes[query]
+            uncharged_overhead()
+            overall_time += time.time() - before
+            return best[1], best[0]
+
+        # depths below the lower bound are infeasible, so they are not searched
+        first = depth_lower_bound(logical_circuit, platform, commutation) - 1
+        incumbent.refuted(first)
+        if depth_workers > 1:
+            probed = probe_depths(first)
+            if probed is None:
+                return None
+            solution, t = probed
+        elif depth_search == "linear":
+            for t in range(max_depth + 1):
+                add_layer(t)
+                if t >= first:
+                    solution = solve_depth(t)
+                    if solution:
+                        break
+            else:
+                return None
+        else:
+            # double the number of extra layers until a solution is found, then
+            # search the depths in between
+            unsat, t, step = first - 1, first, 1
+            while True:
+                t = min(t, max_depth)
+                while len(layer_starts) <= t:
+                    add_layer(len(layer_starts))
+                solution = solve_depth(t)
                 if solution:
-                    depth_time = overall_time
-                    swap_time = 0
-                    if not swap_optimal:
-                        logger.log(
-                            1,
-                            f"found solution with {'CX-' if cx_optimal else ''}depth {t+1} (after {overall_time:.03f}s).",
-                        )
-                        return solution, overall_time, None
-                    number_of_swaps = sum(
-                        1 for atom in solution if atom.startswith("s")
-                    )
-                    logger.log(
-                        1,
-                        f"found solution with depth {t+1} and {number_of_swaps} SWAPs (after {overall_time:.03f}s).",
-                    )
-                    previous_solution = solution
-                    previous_swap_asms: list[Atom] = []
-                    logger.log(
-                        1, "Optimizing for number of SWAPs:", end=" ", flush=True
-                    )
-                    best_so_far = number_of_swaps
-                    worst_so_far = -1
-                    factor = 2
-                    n_swaps = number_of_swaps // factor
-                    while True:
-                        logger.log(1, f"{n_swaps} SWAPs (", flush=True, end="")
-                        swap_asm = new_atom()
-                        swap_asm_constraint = impl(
-                            swap_asm,
-                            at_most_n(
-                                n_swaps,
-                                [
-                                    swap[t][p, p_prime]
-                                    for t in range(t + 1)
-                                    for p, p_prime in connectivity_graph
-                                    if p < p_prime
-                                ],
-                            ),
-                        )
-                        solver.append_formula(swap_asm_constraint)
-                        timer = Timer(time_limit_s - overall_time, solver.interrupt)
-                        timer.start()
-
-                        before = time.time()
-                        res = solver.solve_limited(
-                            assumptions=asm
-                            + [neg(asm) for asm in previous_swap_asms]
-                            + [swap_asm],
-                            expect_interrupt=True,
-                        )
-                        after = time.time()
-                        timer.cancel()
+                    break
+                if t == max_depth:
+                    return None
+                unsat, t, step = t, t + step, step * 2
+            sat = t
+            while sat - unsat > 1:
+                middle = (unsat + sat) // 2
+                middle_solution = solve_depth(middle)
+                if middle_solution:
+                    sat, solution = middle, middle_solution
+                else:
+                    unsat = middle
+            t = sat
 
-                        if res == None:
-                            raise TimeoutError("Timeout")
+        depth_time = overall_time
+        incumbent.refuted(t)
+        incumbent.depth_time = depth_time
+        swap_time = 0
+        if not swap_optimal:
+            logger.log(
+                1,
+                f"found solution with {'CX-' if cx_optimal else ''}depth {t+1} (after {overall_time:.03f}s).",
+            )
+            return solution, overall_time, None
+        number_of_swaps = sum(1 for atom in solution if atom.startswith("s"))
+        logger.log(
+            1,
+            f"found solution with depth {t+1} and {number_of_swaps} SWAPs (after {overall_time:.03f}s).",
+        )
+        asm = depth_assumptions(t)
+        swap_atoms = [s for t in range(t + 1) for s in swap[t].atoms()]
+        if swap_search == "maxsat":
+            logger.log(
+                1, "Optimizing for number of SWAPs with MaxSAT:", end=" ", flush=True
+            )
+            # the depth is fixed by unit clauses and every SWAP costs 1
+            for atom in asm:
+                solver.recorded.clause(atom)
+            before = time.time()
+            model = maxsat_model(
+                solver.recorded.buffer,
+                [neg(s) for s in swap_atoms],
+                time_limit_s - overall_time,
+            )
+            swap_time = time.time() - before
+            overall_time += swap_time
+            solution = parse_sat_solution(model, layer_end(t))
+            number_of_swaps = sum(1 for atom in solution if atom.startswith("s"))
+            logger.log(1, f"optimal: {number_of_swaps} SWAPs.")
+            return solution, overall_time, (depth_time, swap_time)
 
-                        swap_time += after - before
-                        overall_time += after - before
+        previous_solution = solution
+        # one counter over all SWAPs, whose bound is tightened through assumptions
+        counter_clauses, swap_counts = at_most_counter(swap_atoms, number_of_swaps)
+        sink.formula(counter_clauses)
+        logger.log(1, "Optimizing for number of SWAPs:", end=" ", flush=True)
+        best_so_far = number_of_swaps
+        worst_so_far = -1
+        factor = 2
+        n_swaps = number_of_swaps // factor
+        while True:
+            logger.log(1, f"{n_swaps} SWAPs (", flush=True, end="")
+            solution, solve_time = solve(t, asm + [neg(swap_counts[n_swaps])])
+            swap_time += solve_time
+            overall_time += solve_time
 
-                        previous_swap_asms.append(swap_asm)
+            if solution:
+                previous_solution = solution
+                incumbent.found(solution, t + 1)
+                number_of_swaps = sum(1 for atom in solution if atom.startswith("s"))
+                best_so_far = number_of_swaps
+                note = f" -- found {best_so_far}" if best_so_far < n_swaps else ""
+                logger.log(1, f"✓{note}", flush=True, end="), ")
+                if best_so_far == worst_so_far + 1:
+                    logger.log(1, f"optimal: {best_so_far} SWAPs.")
+                    break
+                candidate = best_so_far - max(best_so_far // factor, 1)
+                n_swaps = max(worst_so_far + 1, candidate)
+            elif n_swaps < best_so_far - 1:
+                logger.log(1, f"✗", flush=True, end="), ")
+                worst_so_far = n_swaps
+                incumbent.swap_lower_bound = n_swaps + 1
+                factor *= 2
+                candidate = best_so_far - max(best_so_far // factor, 1)
+                n_swaps = max(worst_so_far + 1, candidate)
+            else:
+                logger.log(1, f"✗), optimal: {best_so_far} SWAPs.")
+                break
 
-                        model = solver.get_model()
-                        solution = parse_sat_solution(model)
-                        if solution:
-                            previous_solution = solution
-                            number_of_swaps = sum(
-                                1 for atom in solution if atom.startswith("s")
-                            )
-                            best_so_far = number_of_swaps
-                            note = (
-                                f" -- found {best_so_far}"
-                                if best_so_far < n_swaps
-                                else ""
-                            )
-                            logger.log(1, f"✓{note}", flush=True, end="), ")
-                            if best_so_far == worst_so_far + 1:
-                                logger.log(1, f"optimal: {best_so_far} SWAPs.")
-                                break
-                            candidate = best_so_far - max(best_so_far // factor, 1)
-                            n_swaps = max(worst_so_far + 1, candidate)
-                        elif n_swaps < best_so_far - 1:
-                            logger.log(1, f"✗", flush=True, end="), ")
-                            worst_so_far = n_swaps
-                            factor *= 2
-                            candidate = best_so_far - max(best_so_far // factor, 1)
-                            n_swaps = max(worst_so_far + 1, candidate)
-                        else:
-                            logger.log(1, f"✗), optimal: {best_so_far} SWAPs.")
-                            break
-
-                    return previous_solution, overall_time, (depth_time, swap_time)
-
-        return None
+        return previous_solution, overall_time, (depth_time, swap_time)
 
     def synthesize(
         self,
@@ -587,26 +1041,240 @@ class PhysSynthesizer(SATSynthesizer):
         swap_optimal: bool = False,
         ancillaries: bool = False,
         swap_bound: int = -1,
+        enabled_encoding: str = "full",
+        gate_mutexes: bool = False,
+        cardinality_policy: str = "adaptive",
+        platform_cache: bool = True,
+        depth_search: str = "linear",
+        heuristic_router: bool = True,
+        depth_workers: int = 1,
+        swap_search: str = "bounds",
+        anytime: bool = True,
+        symmetry_breaking: bool = False,
+        subgraph_embedding: bool = True,
+        region_slack: int = -1,
+        window_layers: int = 0,
+        lookahead_layers: int = 5,
+        split_components: bool = False,
+        unary_blocks: bool = False,
+        commutation: bool = False,
+        carried_phases: bool = True,
     ) -> SynthesizerOutput:
-        circuit = (
-            remove_all_non_cx_gates(logical_circuit) if cx_optimal else logical_circuit
-        )
-
+        if enabled_encoding not in ENABLED_ENCODINGS:
+            raise ValueError(
+                f"Unknown encoding of enabled atoms: '{enabled_encoding}'. Choose one of: {', '.join(ENABLED_ENCODINGS)}"
+            )
+        if cardinality_policy not in CARDINALITY_POLICIES:
+            raise ValueError(
+                f"Unknown cardinality policy: '{cardinality_policy}'. Choose one of: {', '.join(CARDINALITY_POLICIES)}"
+            )
+        if depth_search not in DEPTH_SEARCHES:
+            raise ValueError(
+                f"Unknown depth search: '{depth_search}'. Choose one of: {', '.join(DEPTH_SEARCHES)}"
+            )
+        if swap_search not in SWAP_SEARCHES:
+            raise ValueError(
+                f"Unknown SWAP search: '{swap_search}'. Choose one of: {', '.join(SWAP_SEARCHES)}"
+            )
+        if depth_workers < 1:
+            raise ValueError(
+                f"The number of depth workers must be positive, got {depth_workers}."
+            )
+        if depth_workers > 1 and depth_search != "linear":
+            raise ValueError(
+                "Depths can only be probed in parallel with the linear depth search."
+            )
+        # each worker holds a solver of the same kind with a copy of the formula
+        backend = type(solver).__name__.lower()
+        if depth_workers > 1 and not hasattr(SolverNames, backend):
+            raise ValueError(
+                f"Depths can only be probed in parallel with a single pysat solver, got '{backend}'."
+            )
+        if region_slack < -1:
+            raise ValueError(
+                f"The region slack must be -1 (off) or at least 0, got {region_slack}."
+            )
+        if window_layers < 0 or lookahead_layers < 0:
+            raise ValueError(
+                f"The numbers of window and look-ahead layers must not be negative, got {window_layers} and {lookahead_layers}."
+            )
+        if window_layers and region_slack != -1:
+            raise ValueError(
+                "Windowed synthesis cannot be combined with restricting the platform to a region."
+            )
+        if split_components and region_slack != -1:
+            raise ValueError(
+                "Splitting the circuit into components cannot be combined with restricting the platform to a region."
+            )
+        check_commutation(commutation, cx_optimal)
+        if split_components:
+            # a component only gets its own qubits, and its synthesized circuit has no
+            # classical bits to measure into
+            if logical_circuit.num_clbits:
+                raise ValueError(
+                    "Circuits with classical bits, e.g. measurements, cannot be split into components."
+                )
+            # barriers span components, whose schedules are independent, so they are
+            # dropped
+            logical_circuit = remove_barriers(logical_circuit)
+        if cx_optimal:
+            circuit = remove_all_non_cx_gates(logical_circuit)
+        elif unary_blocks:
+            circuit = compress_unary_runs(logical_circuit)
+        else:
+            circuit = logical_circuit
+        # with the runs of unary gates kept together, the search is only complete for
+        # the schedules that keep them together
+        relaxed = len(circuit.data) < len(logical_circuit.data) and not cx_optimal
         before = time.time()
-        try:
-            out = self.create_solution(
-                circuit,
+        # a circuit whose interaction graph embeds in the platform needs no SWAPs, so it
+        # is solved without encoding anything
+        embedded = embed(circuit, platform, commutation) if subgraph_embedding else None
+        # with commutation, the embedding is scheduled greedily, so unless it meets the
+        # lower bound it is only a solution to improve on
+        scheduled = None
+        if (
+            embedded is not None
+            and commutation
+            and embedded.depth > depth_lower_bound(circuit, platform, commutation)
+        ):
+            scheduled, embedded = embedded, None
+        options = PhysOptions(
+            cx_optimal=cx_optimal,
+            swap_optimal=swap_optimal,
+            ancillaries=ancillaries,
+            swap_bound=swap_bound,
+            enabled_encoding=enabled_encoding,
+            gate_mutexes=gate_mutexes,
+            cardinality_policy=cardinality_policy,
+            platform_cache=platform_cache,
+            depth_search=depth_search,
+            heuristic_router=heuristic_router,
+            depth_workers=depth_workers,
+            swap_search=swap_search,
+            anytime=anytime,
+            symmetry_breaking=symmetry_breaking,
+            subgraph_embedding=subgraph_embedding,
+            region_slack=region_slack,
+            window_layers=window_layers,
+            lookahead_layers=lookahead_layers,
+            split_components=split_components,
+            unary_blocks=unary_blocks,
+            commutation=commutation,
+            carried_phases=carried_phases,
+        )
+        # a SWAP bound is on the whole circuit, so it is not split
+        if split_components and embedded is None and swap_bound == -1:
+            components = interaction_components(circuit)
+            regions = None
+            if len(components) > 1:
+                # the spare physical qubits are shared among the components in
+                # proportion to their sizes, if the wider regions fit
+                spare = platform.qubits - circuit.num_qubits
+                regions = disjoint_regions(
+                    platform,
+                    [len(c) + spare * len(c) // circuit.num_qubits for c in components],
+                ) or disjoint_regions(platform, [len(c) for c in components])
+                if regions is None:
+                    logger.log(
+                        1,
+                        f"\nThe {len(components)} components do not fit on disjoint regions of the platform, solving them jointly.",
+                    )
+            if regions is not None:
+                return self.synthesize_components(
+                    logical_circuit,
+                    platform,
+                    solver,
+                    time_limit_s,
+                    logger,
+                    components,
+                    regions,
+                    options,
+                )
+        if window_layers and embedded is None:
+            return self.synthesize_in_windows(
+                logical_circuit,
                 platform,
                 solver,
+                time_limit_s,
                 logger,
-                cx_optimal,
-                swap_optimal,
-                ancillaries,
+                options,
+            )
+        if region_slack != -1 and embedded is None:
+            return self.synthesize_in_regions(
+                logical_circuit,
+                platform,
+                solver,
                 time_limit_s,
-                swap_bound,
+                logger,
+                options,
+            )
+        pool = SolverPool([backend] * depth_workers) if depth_workers > 1 else None
+        routed = None
+        if heuristic_router and embedded is None:
+            routed = (
+                scheduled
+                if scheduled is not None
+                else route(circuit, platform, commutation=commutation)
             )
+        # the routed circuit is only a solution if it respects the SWAP bound
+        if routed is not None and swap_bound != -1 and len(routed.swaps) > swap_bound:
+            routed = None
+        if routed is not None and symmetry_breaking:
+            # only the image of the routed circuit with the lexicographically smallest
+            # mapped atoms (false before true), i.e. the largest initial mapping, agrees
+            # with the symmetry breaking clauses, so its phases are used
+            routed = max(
+                [routed] + [routed.relabelled(a) for a in platform.automorphisms],
+                key=lambda routed: routed.mappings[0],
+            )
+        incumbent = Incumbent(routed)
+        timed_out = False
+        try:
+            if embedded is not None:
+                logger.log(
+                    1,
+                    f"\nThe interaction graph embeds in the platform, found solution with {'CX-' if cx_optimal else ''}depth {embedded.depth} and no SWAPs.",
+                )
+                out = embedded.solution(), 0.0, (0.0, 0.0) if swap_optimal else None
+            else:
+                out = self.create_solution(
+                    circuit,
+                    platform,
+                    solver if pool is None else pool,
+                    logger,
+                    cx_optimal=cx_optimal,
+                    swap_optimal=swap_optimal,
+                    ancillaries=ancillaries,
+                    time_limit_s=time_limit_s,
+                    swap_bound=swap_bound,
+                    enabled_encoding=enabled_encoding,
+                    gate_mutexes=gate_mutexes,
+                    cardinality_policy=cardinality_policy,
+                    platform_cache=platform_cache,
+                    depth_search=depth_search,
+                    routed=routed,
+                    depth_workers=depth_workers,
+                    swap_search=swap_search,
+                    incumbent=incumbent,
+                    symmetry_breaking=symmetry_breaking,
+                    commutation=commutation,
+                    carried_phases=carried_phases,
+                )
         except TimeoutError:
-            return SynthesizerTimeout()
+            if not anytime or incumbent.solution is None:
+                return SynthesizerTimeout()
+            timed_out = True
+            optional_times = None
+            if swap_optimal and incumbent.depth_time is not None:
+                optional_times = (
+                    incumbent.depth_time,
+                    time_limit_s - incumbent.depth_time,
+                )
+            out = incumbent.solution, time_limit_s, optional_times
+        finally:
+            if pool is not None:
+                pool.delete()
         after = time.time()
         total_time = after - before
 
@@ -633,6 +1301,26 @@ class PhysSynthesizer(SATSynthesizer):
         )
         cx_depth = output_with_only_cnots.depth()
         swaps = count_swaps(output_circuit)
+
+        # a solution returned by a complete search is optimal
+        objective = cx_depth if cx_optimal else depth
+        if timed_out:
+            # the depth of the circuit, which can be below the layers of the solution
+            logger.log(
+                1,
+                f"Timeout, returning the best solution found, with {'CX-' if cx_optimal else ''}depth {objective}.",
+            )
+        lower_bound = (
+            min(incumbent.depth_lower_bound, objective) if timed_out else objective
+        )
+        swap_lower_bound = None
+        if swap_optimal:
+            swap_lower_bound = incumbent.swap_lower_bound if timed_out else swaps
+        if relaxed:
+            lower_bound = min(
+                depth_lower_bound(logical_circuit, platform, commutation), objective
+            )
+            swap_lower_bound = 0 if swap_optimal else None
         return SynthesizerSolution(
             output_circuit,
             initial_mapping,
@@ -640,4 +1328,537 @@ class PhysSynthesizer(SATSynthesizer):
             depth,
             cx_depth,
             swaps,
+            lower_bound,
+            (objective - lower_bound) / objective if objective else 0.0,
+            swap_lower_bound,
+            depth_times=incumbent.depth_times or None,
+        )
+
+    def synthesize_in_regions(
+        self,
+        logical_circuit: QuantumCircuit,
+        platform: Platform,
+        solver: Solver,
+        time_limit_s: int,
+        logger: Logger,
+        options: PhysOptions,
+    ) -> SynthesizerOutput:
+        """
+        Synthesizes on a connected region of the platform with `options.region_slack`
+        more physical qubits than logical ones (see `connected_region`), so that the
+        encoding scales with the circuit rather than the platform.
+
+        A region has no solution at depths where the platform may have one, so unless
+        the solution meets the lower bound of the whole platform (and has no SWAPs with
+        SWAP optimization), the slack is doubled and the search is repeated on the wider
+        region with a fresh solver of the same kind. This stops once a wider region does
+        not improve on the best solution, the region is the whole platform or time runs
+        out, and the best solution carries the lower bound of the whole platform and its
+        gap to it.
+        """
+        cx_optimal = options.cx_optimal
+
+        def proven(solution: SynthesizerSolution) -> bool:
+            """Whether a solution is proven optimal on the whole platform."""
+            return not solution.gap and solution.swap_lower_bound in (
+                None,
+                solution.swaps,
+            )
+
+        circuit = (
+            remove_all_non_cx_gates(logical_circuit) if cx_optimal else logical_circuit
+        )
+        lower_bound = depth_lower_bound(circuit, platform, options.commutation)
+        best: SynthesizerSolution | None = None
+        output: SynthesizerOutput = SynthesizerTimeout()
+        solver_time = 0.0
+        before = time.time()
+        slack = options.region_slack
+        # whether the search stopped before the time ran out
+        settled = False
+        while (remaining := time_limit_s - (time.time() - before)) > 0:
+            size = logical_circuit.num_qubits + slack
+            region = (
+                connected_region(platform, size) if size < platform.qubits else None
+            )
+            region_platform = (
+                platform if region is None else platform.restricted(region)
+            )
+            logger.log(
+                1,
+                f"\nRegion of {region_platform.qubits} physical qubits:",
+                end="",
+                flush=True,
+            )
+            region_solver = solver if best is None else type(solver)()
+            output = self.synthesize(
+                logical_circuit,
+                region_platform,
+                region_solver,
+                remaining,
+                logger,
+                **asdict(replace(options, region_slack=-1)),
+            )
+            if region_solver is not solver:
+                region_solver.delete()
+            if not isinstance(output, SynthesizerSolution):
+                break
+            solver_time += output.solver_time
+
+            objective = output.cx_depth if cx_optimal else output.depth
+            if region is not None:
+                # back to the physical qubits of the platform
+                register = QuantumRegister(platform.qubits, "p")
+                circuit_on_platform = QuantumCircuit(register)
+                circuit_on_platform.compose(output.circuit, qubits=region, inplace=True)
+                output = SynthesizerSolution(
+                    circuit_on_platform,
+                    {
+                        l: PhysicalQubit(region[p.id])
+                        for l, p in output.initial_mapping.items()
+                    },
+                    (0.0, 0.0, output.optional_times),
+                    output.depth,
+                    output.cx_depth,
+                    output.swaps,
+                    0,
+                    0.0,
+                    0 if options.swap_optimal else None,
+                    depth_times=output.depth_times,
+                )
+            elif output.lower_bound is not None:
+                # proven on the whole platform, whichever solution is kept
+                lower_bound = max(lower_bound, output.lower_bound)
+            best_objective = None
+            if best is not None:
+                best_objective = best.cx_depth if cx_optimal else best.depth
+            improved = best is None or (objective, output.swaps) < (
+                best_objective,
+                best.swaps,
+            )
+            if improved:
+                best = output
+            best_objective = best.cx_depth if cx_optimal else best.depth
+            best.lower_bound = min(lower_bound, best_objective)
+            best.gap = (
+                (best_objective - best.lower_bound) / best_objective
+                if best_objective
+                else 0.0
+            )
+            if region is None and best_objective == objective:
+                best.swap_lower_bound = output.swap_lower_bound
+            # a region that is not better than a narrower one suggests that the
+            # optimum is not limited by the region
+            if region is None or proven(best) or not improved:
+                if not improved:
+                    logger.log(
+                        1,
+                        "\nThe wider region does not improve on the solution, keeping it.",
+                    )
+                settled = True
+                break
+            slack = max(2 * slack, 1)
+
+        if best is None:
+            return output
+        if not settled and not proven(best) and not options.anytime:
+            return SynthesizerTimeout()
+        best.total_time = time.time() - before
+        best.solver_time = solver_time
+        return best
+
+    def synthesize_in_windows(
+        self,
+        logical_circuit: QuantumCircuit,
+        platform: Platform,
+        solver: Solver,
+        time_limit_s: int,
+        logger: Logger,
+        options: PhysOptions,
+    ) -> SynthesizerOutput:
+        """
+        Synthesizes the circuit in time slices, so that no formula covers more than a
+        window of it.
+
+        A window holds the remaining gates in their first `options.window_layers`
+        earliest layers and, as a look-ahead, those in the next
+        `options.lookahead_layers`. It is solved depth-optimally from the final mapping
+        of the previous window, and its solution is kept up to the layer of the last
+        gate that is not a look-ahead, so look-ahead gates executed by then are kept
+        too. Every window gets an equal share of the remaining time, and falls back to
+        the greedy router from its initial mapping when it runs out. The windows are
+        stitched together and reported with their depths and the lower bounds proven for
+        them. The platform symmetries are not broken, as the initial mappings of later
+        windows are fixed.
+
+        This trades quality for speed: a window is only optimal given the mapping it
+        starts from, and its greedy fallback can add many SWAPs, so the stitched circuit
+        can be far from optimal, and deeper than what solving the whole circuit (or the
+        anytime fallback) returns in the same time. It is meant for circuits whose
+        formula is too large to solve at once.
+        """
+        cx_optimal = options.cx_optimal
+        swap_optimal = options.swap_optimal
+        anytime = options.anytime
+        depth_workers = options.depth_workers
+        window_layers = options.window_layers
+        lookahead_layers = options.lookahead_layers
+        backend = type(solver).__name__.lower()
+        if cx_optimal:
+            circuit = remove_all_non_cx_gates(logical_circuit)
+        elif options.unary_blocks:
+            circuit = compress_unary_runs(logical_circuit)
+        else:
+            circuit = logical_circuit
+
+        register = QuantumRegister(platform.qubits, "p")
+        output_circuit = QuantumCircuit(register)
+        initial_mapping: dict[LogicalQubit, PhysicalQubit] | None = None
+        windows: list[tuple[int, int, int]] = []
+        mapping: list[int] | None = None
+        # without ancillaries, the logical qubits stay on the qubits they start on, so
+        # they are placed on a connected region lest later windows cannot be routed
+        region = (
+            None
+            if options.ancillaries
+            else connected_region(platform, circuit.num_qubits)
+        )
+        remaining = list(range(len(circuit.data)))
+        solver_time = 0.0
+        depth_time = 0.0
+        before = time.time()
+        while remaining:
+            window_circuit = circuit.copy_empty_like()
+            for g in remaining:
+                window_circuit.append(circuit.data[g])
+            gate_asap = gate_asap_mapping(window_circuit, options.commutation)
+            layers = max(gate_asap.values()) + 1
+            # the gates of the window, as indices into the remaining gates
+            gates = [
+                g
+                for g in range(len(remaining))
+                if gate_asap[g] < window_layers + lookahead_layers
+            ]
+            core = {i for i, g in enumerate(gates) if gate_asap[g] < window_layers}
+            window_circuit = circuit.copy_empty_like()
+            for g in gates:
+                window_circuit.append(circuit.data[remaining[g]])
+
+            logger.log(
+                1,
+                f"\nWindow {len(windows) + 1} ({len(core)} gates and {len(gates) - len(core)} look-ahead gates):",
+                end="",
+                flush=True,
+            )
+            if mapping is None:
+                routed = route(
+                    window_circuit, platform, commutation=options.commutation
+                )
+            else:
+                routed = route_from(
+                    window_circuit, platform, mapping, options.commutation
+                )
+            if not options.heuristic_router or (
+                routed is not None
+                and options.swap_bound != -1
+                and len(routed.swaps) > options.swap_bound
+            ):
+                routed = None
+            incumbent = Incumbent(routed)
+            elapsed = time.time() - before
+            share = (time_limit_s - elapsed) / -(-layers // window_layers)
+            if depth_workers > 1:
+                window_solver = SolverPool([backend] * depth_workers)
+            else:
+                window_solver = solver if not windows else type(solver)()
+            try:
+                out = self.create_solution(
+                    window_circuit,
+                    platform,
+                    window_solver,
+                    logger,
+                    cx_optimal=cx_optimal,
+                    swap_optimal=swap_optimal,
+                    ancillaries=options.ancillaries,
+                    time_limit_s=share,
+                    swap_bound=options.swap_bound,
+                    enabled_encoding=options.enabled_encoding,
+                    gate_mutexes=options.gate_mutexes,
+                    cardinality_policy=options.cardinality_policy,
+                    platform_cache=options.platform_cache,
+                    depth_search=options.depth_search,
+                    routed=routed,
+                    depth_workers=depth_workers,
+                    swap_search=options.swap_search,
+                    incumbent=incumbent,
+                    symmetry_breaking=False,
+                    fixed_mapping=mapping,
+                    initial_region=region,
+                    commutation=options.commutation,
+                    carried_phases=options.carried_phases,
+                )
+                if out is None:
+                    return SynthesizerNoSolution()
+                solution, window_time, optional_times = out
+                depth = lower_bound = incumbent.depth
+                depth_time += (
+                    optional_times[0] if optional_times is not None else window_time
+                )
+            except TimeoutError:
+                if not anytime or incumbent.solution is None:
+                    return SynthesizerTimeout()
+                logger.log(
+                    1,
+                    f"Timeout, keeping the best solution found for the window, with {incumbent.depth} layers.",
+                )
+                solution, window_time = incumbent.solution, share
+                depth, lower_bound = incumbent.depth, incumbent.depth_lower_bound
+                depth_time += (
+                    incumbent.depth_time if incumbent.depth_time is not None else share
+                )
+            finally:
+                if window_solver is not solver:
+                    window_solver.delete()
+            solver_time += window_time
+            region = None
+
+            # keep the solution up to the layer of the last gate of the window
+            atoms = [name for name in solution if not name.startswith("~")]
+            gate_layers = {
+                int(name.split("_")[1]): int(name.split("^")[1].split("_")[0])
+                for name in atoms
+                if name.startswith("c")
+            }
+            durations = gate_duration_mapping(window_circuit)
+            cut = max(gate_layers[g] + durations[g] - 1 for g in core)
+            kept = [
+                name for name in atoms if int(name.split("^")[1].split("_")[0]) <= cut
+            ]
+            window_output, window_mapping = self.parse_solution(
+                window_circuit, platform, kept
+            )
+            output_circuit.compose(window_output, inplace=True)
+            if initial_mapping is None:
+                initial_mapping = window_mapping
+            mapping = [0] * circuit.num_qubits
+            for name in atoms:
+                if name.startswith(f"m^{cut}_"):
+                    l, p = name.split("_")[1].split(";")
+                    mapping[int(l)] = int(p)
+            done = {gates[i] for i, layer in gate_layers.items() if layer <= cut}
+            windows.append((len(done), depth, lower_bound))
+            remaining = [g for i, g in enumerate(remaining) if i not in done]
+        after = time.time()
+
+        if cx_optimal:
+            output_circuit = reinsert_unary_gates(
+                logical_circuit, output_circuit, initial_mapping, options.ancillaries
+            )
+        output_circuit_with_cnots_as_swap = with_swaps_as_cnots(
+            output_circuit, register_name="p"
+        )
+        depth = output_circuit_with_cnots_as_swap.depth()
+        cx_depth = remove_all_non_cx_gates(output_circuit_with_cnots_as_swap).depth()
+        swaps = count_swaps(output_circuit)
+        # the stitched solution is only optimal per window
+        objective = cx_depth if cx_optimal else depth
+        lower_bound = min(
+            depth_lower_bound(circuit, platform, options.commutation), objective
+        )
+        return SynthesizerSolution(
+            output_circuit,
+            initial_mapping,
+            (
+                after - before,
+                solver_time,
+                (depth_time, solver_time - depth_time) if swap_optimal else None,
+            ),
+            depth,
+            cx_depth,
+            swaps,
+            lower_bound,
+            (objective - lower_bound) / objective if objective else 0.0,
+            0 if swap_optimal else None,
+            windows,
         )
+
+    def synthesize_components(
+        self,
+        logical_circuit: QuantumCircuit,
+        platform: Platform,
+        solver: Solver,
+        time_limit_s: int,
+        logger: Logger,
+        components: list[list[int]],
+        regions: list[list[int]],
+        options: PhysOptions,
+    ) -> SynthesizerOutput:
+        """
+        Synthesizes every component of the circuit (see `interaction_components`) on its
+        own region of the platform in a worker process with a solver of the given kind, as
+        many at once as there are CPUs, and merges the outputs.
+
+        A component is only solved optimally for its region, so the merged circuit carries
+        the lower bound of the whole platform. Unless it meets that bound (and has no SWAPs,
+        with SWAP optimization), the circuit is solved jointly in the remaining time, and
+        the better of the two solutions is returned.
+        """
+        cx_optimal = options.cx_optimal
+        # neither the components nor the joint fallback are split again
+        options = replace(options, split_components=False)
+        before = time.time()
+        deadline = before + time_limit_s
+        workers = min(len(components), os.cpu_count() or 1)
+        pending = list(range(len(components)))
+        running: dict[Connection, tuple[int, multiprocessing.Process]] = {}
+        outputs: dict[int, SynthesizerOutput] = {}
+        try:
+            while pending or running:
+                while pending and len(running) < workers:
+                    i = pending.pop(0)
+                    index = {l: j for j, l in enumerate(components[i])}
+                    component_circuit = QuantumCircuit(len(components[i]))
+                    for instr in logical_circuit.data:
+                        if instr.qubits[0]._index in index:
+                            component_circuit.append(
+                                instr.operation,
+                                [index[q._index] for q in instr.qubits],
+                            )
+                    connection, worker_connection = multiprocessing.Pipe()
+                    # not daemonic, as the worker may start processes of its own, e.g.
+                    # for a portfolio, depth workers or the MaxSAT solver
+                    process = multiprocessing.Process(
+                        target=serve_component,
+                        args=(
+                            self,
+                            component_circuit,
+                            platform.restricted(regions[i]),
+                            type(solver),
+                            deadline,
+                            options,
+                            worker_connection,
+                        ),
+                    )
+                    process.start()
+                    # the worker holds the only other end, so its exit is seen as EOF
+                    worker_connection.close()
+                    running[connection] = (i, process)
+
+                remaining = max(deadline - time.time(), 0) + COMPONENT_GRACE_S
+                finished = wait(list(running), remaining)
+                if not finished:
+                    return SynthesizerTimeout()
+                for connection in finished:
+                    i, process = running.pop(connection)
+                    try:
+                        outputs[i] = connection.recv()
+                    except EOFError:
+                        raise RuntimeError(f"The worker of component {i + 1} failed.")
+                    finally:
+                        process.join()
+                        connection.close()
+                    if isinstance(outputs[i], Exception):
+                        raise RuntimeError(
+                            f"The worker of component {i + 1} failed."
+                        ) from outputs[i]
+                    logger.log(
+                        1,
+                        f"\nComponent {i + 1} ({len(components[i])} logical qubits on physical qubits {', '.join(map(str, regions[i]))}): ",
+                        end="",
+                    )
+                    output = outputs[i]
+                    if not isinstance(output, SynthesizerSolution):
+                        logger.log(1, str(output))
+                        return output
+                    logger.log(
+                        1,
+                        f"{'CX-' if cx_optimal else ''}depth {output.cx_depth if cx_optimal else output.depth} and {output.swaps} SWAPs (after {output.total_time:.03f}s).",
+                    )
+        finally:
+            for connection, (_, process) in running.items():
+                process.terminate()
+                process.join(COMPONENT_GRACE_S)
+                if process.is_alive():
+                    process.kill()
+                    process.join()
+                connection.close()
+        after = time.time()
+
+        register = QuantumRegister(platform.qubits, "p")
+        output_circuit = QuantumCircuit(register)
+        initial_mapping: dict[LogicalQubit, PhysicalQubit] = {}
+        solver_time = 0.0
+        for i, output in sorted(outputs.items()):
+            output_circuit.compose(output.circuit, qubits=regions[i], inplace=True)
+            for l, p in output.initial_mapping.items():
+                initial_mapping[LogicalQubit(components[i][l.id])] = PhysicalQubit(
+                    regions[i][p.id]
+                )
+            solver_time += output.solver_time
+        optional_times = None
+        if options.swap_optimal:
+            optional_times = tuple(
+                sum(
+                    output.optional_times[j]
+                    for output in outputs.values()
+                    if output.optional_times is not None
+                )
+                for j in range(2)
+            )
+
+        output_circuit_with_cnots_as_swap = with_swaps_as_cnots(
+            output_circuit, register_name="p"
+        )
+        depth = output_circuit_with_cnots_as_swap.depth()
+        cx_depth = remove_all_non_cx_gates(output_circuit_with_cnots_as_swap).depth()
+        swaps = count_swaps(output_circuit)
+        circuit = (
+            remove_all_non_cx_gates(logical_circuit) if cx_optimal else logical_circuit
+        )
+        objective = cx_depth if cx_optimal else depth
+        lower_bound = min(
+            depth_lower_bound(circuit, platform, options.commutation), objective
+        )
+        split = SynthesizerSolution(
+            output_circuit,
+            initial_mapping,
+            (after - before, solver_time, optional_times),
+            depth,
+            cx_depth,
+            swaps,
+            lower_bound,
+            (objective - lower_bound) / objective if objective else 0.0,
+            0 if options.swap_optimal else None,
+            regions=regions,
+        )
+        if lower_bound == objective and (not options.swap_optimal or swaps == 0):
+            return split
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return split
+        logger.log(
+            1,
+            f"\nThe components are only optimal within their regions, solving them jointly.",
+        )
+        joint = self.synthesize(
+            logical_circuit, platform, solver, remaining, logger, **asdict(options)
+        )
+        if not isinstance(joint, SynthesizerSolution):
+            return split
+
+        def cost(output: SynthesizerSolution) -> tuple[int, int]:
+            return (
+                output.cx_depth if cx_optimal else output.depth,
+                output.swaps if options.swap_optimal else 0,
+            )
+
+        best = joint if cost(joint) <= cost(split) else split
+        # the bounds proven by the joint search hold for both solutions
+        best.lower_bound = max(split.lower_bound, joint.lower_bound or 0)
+        objective = cost(best)[0]
+        best.gap = (objective - best.lower_bound) / objective if objective else 0.0
+        if options.swap_optimal:
+            best.swap_lower_bound = joint.swap_lower_bound
+        best.total_time = time.time() - before
+        best.solver_time = split.solver_time + joint.solver_time
+        return best
@@ -0,0 +1,249 @@
+from multiprocessing.connection import Connection, wait
+from typing import Iterable, Sequence
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+import pysat.solvers
+
+# The pysat solvers raced by default. CaDiCaL cannot be interrupted, so when it loses
+# a race it finishes the abandoned query in the background before it races again.
+PORTFOLIO = ("cadical153", "glucose42", "maplechrono", "minisat22")
+
+# The pysat solvers that support `interrupt`.
+INTERRUPTIBLE = (
+    "glucose3",
+    "glucose4",
+    "glucose42",
+    "maplechrono",
+    "maplecm",
+    "maplesat",
+    "mergesat3",
+    "minicard",
+    "minisat22",
+    "minisat-gh",
+)
+
+
+def serve(name: str, connection: Connection):
+    """
+    Runs one solver of a pool in a worker process.
+
+    Clauses, phases and queries arrive in order on `connection`, and each query is
+    answered with its number, its result and the model. Messages are received in a
+    separate thread, so that the pool is never blocked by a busy solver and cancelling a
+    query can interrupt it. A cancelled query that has not started yet is skipped.
+    """
+    solver = pysat.solvers.Solver(name=name)
+    interruptible = name in INTERRUPTIBLE
+    messages: queue.Queue = queue.Queue()
+    lock = threading.Lock()
+    cancelled: set[int] = set()
+    current = None
+
+    def receive():
+        while True:
+            message = connection.recv()
+            if message[0] == "cancel":
+                with lock:
+                    cancelled.add(message[1])
+                    if interruptible and current == message[1]:
+                        solver.interrupt()
+            else:
+                messages.put(message)
+            if message[0] == "stop":
+                return
+
+    threading.Thread(target=receive, daemon=True).start()
+
+    while (message := messages.get())[0] != "stop":
+        match message:
+            case ("clauses", clauses):
+                solver.append_formula(clauses)
+            case ("phases", literals):
+                solver.set_phases(literals)
+            case ("solve", query, assumptions):
+                with lock:
+                    if query in cancelled:
+                        continue
+                    current = query
+                    if interruptible:
+                        solver.clear_interrupt()
+                res = solver.solve_limited(
+                    assumptions=assumptions, expect_interrupt=interruptible
+                )
+                with lock:
+                    current = None
+                connection.send((query, res, solver.get_model() if res else None))
+    solver.delete()
+
+
+class SolverPool:
+    """
+    Solvers in worker processes that share one formula.
+
+    Clauses and phases are buffered and forwarded to every solver before the next
+    query. Queries are submitted to single solvers, answered in any order and can be
+    cancelled. The workers are started on first use.
+
+    The time spent starting the workers and forwarding clauses and phases to them is
+    solver time outside of the queries, so it is summed up in `overhead` for the caller
+    to count against its time limit.
+    """
+
+    def __init__(self, names: Sequence[str]):
+        self.names = list(names)
+        self.workers: list[tuple[multiprocessing.Process, Connection]] = []
+        self.buffer: list[list[int]] = []
+        self.variables = 0
+        self.queries = 0
+        # the worker of every query that is neither answered nor cancelled
+        self.pending: dict[int, int] = {}
+        self.lock = threading.Lock()
+        self.overhead = 0.0
+
+    def start(self):
+        if self.workers:
+            return
+        before = time.time()
+        for name in self.names:
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=serve, args=(name, worker_connection), daemon=True
+            )
+            process.start()
+            self.workers.append((process, connection))
+        self.overhead += time.time() - before
+
+    def send(self, worker: int, message):
+        with self.lock:
+            self.workers[worker][1].send(message)
+
+    def flush(self):
+        self.start()
+        if self.buffer:
+            before = time.time()
+            for worker in range(len(self.workers)):
+                self.send(worker, ("clauses", self.buffer))
+            self.buffer = []
+            self.overhead += time.time() - before
+
+    def add_clause(self, clause: list[int], no_return: bool = True):
+        self.buffer.append(clause)
+        self.variables = max(self.variables, max(map(abs, clause), default=0))
+
+    def append_formula(self, formula: Iterable[list[int]], no_return: bool = True):
+        formula = list(formula)
+        self.buffer.extend(formula)
+        self.variables = max(
+            self.variables,
+            max(map(abs, itertools.chain.from_iterable(formula)), default=0),
+        )
+
+    def set_phases(self, literals: Sequence[int] | None = None):
+        self.flush()
+        before = time.time()
+        for worker in range(len(self.workers)):
+            self.send(worker, ("phases", list(literals or [])))
+        self.overhead += time.time() - before
+
+    def nof_vars(self) -> int:
+        return self.variables
+
+    def idle(self) -> list[int]:
+        """The workers without a pending query."""
+        busy = set(self.pending.values())
+        return [worker for worker in range(len(self.names)) if worker not in busy]
+
+    def submit(self, assumptions: list[int], worker: int | None = None) -> int:
+        """
+        Submits a query to the given or the first idle worker and returns its number.
+        """
+        self.flush()
+        if worker is None:
+            worker = self.idle()[0]
+        with self.lock:
+            self.queries += 1
+            query = self.queries
+            self.pending[query] = worker
+        self.send(worker, ("solve", query, assumptions))
+        return query
+
+    def cancel(self, query: int):
+        with self.lock:
+            worker = self.pending.pop(query, None)
+        if worker is not None:
+            self.send(worker, ("cancel", query))
+
+    def receive(
+        self, timeout: float | None = None
+    ) -> tuple[int, int, bool | None, list[int] | None] | None:
+        """
+        Waits for the answer to a pending query and returns its number, worker, result
+        and model, or `None` if there is none by the timeout or no query is pending
+        anymore. Answers to cancelled queries are dropped.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        connections = [connection for _, connection in self.workers]
+        while self.pending:
+            remaining = 0.1 if deadline is None else min(deadline - time.time(), 0.1)
+            if remaining <= 0:
+                return None
+            # wake up regularly to notice queries cancelled by other threads
+            for connection in wait(connections, remaining):
+                query, res, model = connection.recv()
+                with self.lock:
+                    worker = self.pending.pop(query, None)
+                if worker is not None:
+                    return query, worker, res, model
+        return None
+
+    def delete(self):
+        for process, connection in self.workers:
+            process.terminate()
+            process.join()
+            connection.close()
+        self.workers = []
+        self.pending = {}
+
+
+class PortfolioSolver(SolverPool):
+    """
+    Races several pysat solvers on the same formula.
+
+    Each query is sent to every solver and answered by the one that finishes first. The
+    queries of the other solvers are cancelled.
+    """
+
+    def __init__(self, names: Sequence[str] = PORTFOLIO):
+        super().__init__(names)
+        self.model: list[int] | None = None
+        self.winner: str | None = None
+
+    def solve(self, assumptions: Sequence[int] | None = None) -> bool | None:
+        return self.solve_limited(assumptions)
+
+    def solve_limited(
+        self, assumptions: Sequence[int] | None = None, expect_interrupt: bool = False
+    ) -> bool | None:
+        """
+        Answers the query with the first solver that finishes, or returns `None` if it
+        is interrupted.
+        """
+        for worker in range(len(self.names)):
+            self.submit(list(assumptions or []), worker)
+        while (reply := self.receive()) is not None:
+            _, worker, res, model = reply
+            if res is not None:
+                self.model, self.winner = model, self.names[worker]
+                self.interrupt()
+                return res
+        return None
+
+    def interrupt(self):
+        for query in list(self.pending):
+            self.cancel(query)
+
+    def get_model(self) -> list[int] | None:
+        return self.model
@@ -3,9 +3,10 @@ from qiskit import QuantumCircuit
 from platforms import Platform
 from util.logger import Logger
 from util.circuits import LogicalQubit, PhysicalQubit, SynthesizerOutput
+from synthesizers.sat.portfolio import PortfolioSolver
 import pysat.solvers
 
-type Solver = pysat.solvers.Glucose42 | pysat.solvers.MapleCM | pysat.solvers.Cadical153 | pysat.solvers.MapleChrono | pysat.solvers.Minisat22 | pysat.solvers.Cadical195
+type Solver = pysat.solvers.Glucose42 | pysat.solvers.MapleCM | pysat.solvers.Cadical153 | pysat.solvers.MapleChrono | pysat.solvers.Minisat22 | pysat.solvers.Cadical195 | PortfolioSolver
 
 
 class SATSynthesizer(ABC):
@@ -32,6 +33,24 @@ class SATSynthesizer(ABC):
         swap_optimal: bool = False,
         ancillaries: bool = False,
         swap_bound: int = -1,
+        enabled_encoding: str = "full",
+        gate_mutexes: bool = False,
+        cardinality_policy: str = "adaptive",
+        platform_cache: bool = True,
+        depth_search: str = "linear",
+        heuristic_router: bool = True,
+        depth_workers: int = 1,
+        swap_search: str = "bounds",
+        anytime: bool = True,
+        symmetry_breaking: bool = False,
+        subgraph_embedding: bool = True,
+        region_slack: int = -1,
+        window_layers: int = 0,
+        lookahead_layers: int = 5,
+        split_components: bool = False,
+        unary_blocks: bool = False,
+        commutation: bool = False,
+        carried_phases: bool = True,
     ) -> SynthesizerOutput:
         """
         Layout synthesis.
@@ -41,6 +60,24 @@ class SATSynthesizer(ABC):
         - logical_circuit (`QuantumCircuit`): Logical circuit.
         - platform (`Platform`): The target platform.
         - solver (`Solver`): The underlying solver.
+        - enabled_encoding (`str`): How CX connectivity is encoded, 'full' or 'support'.
+        - gate_mutexes (`bool`): Whether to also forbid all dependent gates from being current together.
+        - cardinality_policy (`str`): How encodings of exactly-one and at-most-one constraints are picked.
+        - platform_cache (`bool`): Whether to cache the circuit-independent clauses of the platform on disk.
+        - depth_search (`str`): How the optimal depth is searched for, 'linear' or 'exponential'.
+        - heuristic_router (`bool`): Whether to route the circuit greedily first, to bound the depth, warm-start the solver and return on timeout.
+        - depth_workers (`int`): Number of worker processes that probe consecutive depths in parallel.
+        - swap_search (`str`): How the number of SWAPs is minimized, 'bounds' or 'maxsat'.
+        - anytime (`bool`): Whether to return the best solution found instead of a timeout, with its proven lower bounds.
+        - symmetry_breaking (`bool`): Whether to only search initial mappings that are lexicographically smallest under the automorphisms of the platform.
+        - subgraph_embedding (`bool`): Whether to skip the solver when the interaction graph of the circuit embeds in the platform, which needs no SWAPs.
+        - region_slack (`int`): Number of physical qubits beyond the logical ones in the first connected region the platform is restricted to, widened until the solution is proven optimal or a wider region does not improve it (-1: off).
+        - window_layers (`int`): Number of earliest layers of gates solved at a time, from the final mapping of the previous window, instead of solving the whole circuit at once (0: off). This trades quality for speed, as every window is only optimal given its initial mapping.
+        - lookahead_layers (`int`): Number of earliest layers of gates after a window that are solved along with it.
+        - split_components (`bool`): Whether groups of logical qubits that never share a CX gate are synthesized on disjoint regions of the platform in parallel processes.
+        - unary_blocks (`bool`): Whether runs of unary gates on a qubit are encoded as single blocks spanning their layers, which shrinks the formula but only proves optimality among the schedules that keep each run together, so the reported lower bounds fall back to the platform bound.
+        - commutation (`bool`): Whether gates that commute may be reordered, so that gates only depend on the gates they do not commute with (see `line_commutation_groups`).
+        - carried_phases (`bool`): Whether the solver prefers the mapping of the best assignment found so far (the routed circuit, the placement of the router or the shallowest solution) when searching the next depth, instead of only that of the routed circuit. This only has an effect without the heuristic router, where the later layers prefer its placement, and when a solution is followed by more queries, i.e. the exponential depth search and the SWAP optimization with bounds.
 
         Returns
         --------
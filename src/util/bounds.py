@@ -0,0 +1,153 @@
+from qiskit import QuantumCircuit
+from platforms import Platform
+from util.circuits import (
+    gate_alap_mapping,
+    gate_asap_mapping,
+    gate_duration_mapping,
+    line_commutation_groups,
+    lq_interaction_mapping,
+    SWAP_LAYERS,
+)
+
+
+def pair_depth_bounds(
+    circuit: QuantumCircuit, max_distance: int, commutation: bool = False
+) -> dict[tuple[int, int], list[int]]:
+    """
+    Returns a mapping of each pair of logical qubits that share a CX gate to lower bounds on
+    the depth, indexed by the distance between the qubits in the initial mapping (index 0
+    is unused).
+
+    To execute a CX gate on qubits that start `d` apart, the two qubits together have to
+    take part in at least `d - 1` SWAPs before it. A qubit cannot execute gates while it is
+    swapped, so the gate cannot happen before the qubit has executed all of its earlier
+    gates and its SWAPs, and the longest chain of gates starting with the gate has to fit
+    after it. With commutation, only the gates of earlier commutation groups on the line
+    are necessarily earlier.
+    """
+    asap = gate_asap_mapping(circuit, commutation)
+    alap = gate_alap_mapping(circuit, commutation=commutation)
+    durations = gate_duration_mapping(circuit)
+    depth = max((alap[gate] + durations[gate] for gate in alap), default=0)
+    # number of layers the gates on the line of a qubit before a gate on that line take
+    gates_before: dict[int, dict[int, int]] = {}
+    for line, groups in line_commutation_groups(circuit, commutation).items():
+        layers = 0
+        gates_before[line] = {}
+        for group in groups:
+            for gate in group:
+                gates_before[line][gate] = layers
+            layers += sum(durations[gate] for gate in group)
+
+    bounds = {}
+    for (l, l_prime), (gates, _, _) in lq_interaction_mapping(
+        circuit, commutation
+    ).items():
+        pair_bounds = [0] * (max_distance + 1)
+        for gate in gates:
+            before, before_prime = gates_before[l][gate], gates_before[l_prime][gate]
+            height = depth - alap[gate]
+            for distance in range(1, max_distance + 1):
+                swaps = distance - 1
+                earliest = min(
+                    max(
+                        before + SWAP_LAYERS * swaps_l,
+                        before_prime + SWAP_LAYERS * (swaps - swaps_l),
+                    )
+                    for swaps_l in range(swaps + 1)
+                )
+                pair_bounds[distance] = max(
+                    pair_bounds[distance], max(asap[gate], earliest) + height
+                )
+        bounds[(l, l_prime)] = pair_bounds
+    return bounds
+
+
+def depth_lower_bound(
+    circuit: QuantumCircuit, platform: Platform, commutation: bool = False
+) -> int:
+    """
+    Returns a lower bound on the depth of any layout synthesis of the circuit on the
+    platform, with SWAPs taking 3 layers as in the SAT encoding.
+
+    The bound relaxes the initial mapping: a logical qubit may be placed on a physical
+    qubit `p` if its CX partners fit into the balls around `p`, i.e. if no more than
+    `|ball_r(p)| - 1` partners have to be within distance `r` of it, given the depth each
+    partner forces at each distance (see `pair_depth_bounds`). The bound is the smallest
+    depth at which every logical qubit can be placed on a different physical qubit.
+
+    With commutation, the bound is on the circuits with commuting gates reordered, and as
+    gates that commute still cannot share a layer, it is at least the number of layers
+    the gates on any qubit take.
+    """
+    asap = gate_asap_mapping(circuit, commutation)
+    durations = gate_duration_mapping(circuit)
+    depth = max((asap[gate] + durations[gate] for gate in asap), default=0)
+    for groups in line_commutation_groups(circuit, commutation).values():
+        depth = max(depth, sum(durations[gate] for group in groups for gate in group))
+    distances = platform.distances
+    # the longest distance between connected qubits
+    max_distance = max(
+        (d for row in distances for d in row if d < platform.qubits), default=0
+    )
+    pair_bounds = pair_depth_bounds(circuit, max_distance, commutation)
+    if not pair_bounds or max_distance == 0:
+        return depth
+
+    # ball_sizes[p][r] is the number of physical qubits within distance r of p
+    ball_sizes = []
+    for p in range(platform.qubits):
+        counts = [0] * (max_distance + 1)
+        for d in distances[p]:
+            if d <= max_distance:
+                counts[d] += 1
+        for r in range(1, max_distance + 1):
+            counts[r] += counts[r - 1]
+        ball_sizes.append(counts)
+
+    partner_bounds: dict[int, list[list[int]]] = {}
+    for (l, l_prime), bounds in pair_bounds.items():
+        partner_bounds.setdefault(l, []).append(bounds)
+        partner_bounds.setdefault(l_prime, []).append(bounds)
+
+    def positions(bounds: list[list[int]], bound: int) -> list[int]:
+        """The physical qubits a logical qubit with the given partners fits on."""
+        # the number of partners that have to be within each distance
+        within = [0] * (max_distance + 1)
+        for partner in bounds:
+            allowed = max(
+                (d for d in range(1, max_distance + 1) if partner[d] <= bound),
+                default=0,
+            )
+            if allowed == 0:
+                return []
+            within[allowed] += 1
+        for r in range(1, max_distance + 1):
+            within[r] += within[r - 1]
+        return [
+            p
+            for p, sizes in enumerate(ball_sizes)
+            if all(within[r] <= sizes[r] - 1 for r in range(1, max_distance + 1))
+        ]
+
+    def placeable(bound: int) -> bool:
+        """Whether all logical qubits fit on different physical qubits."""
+        candidates = [positions(bounds, bound) for bounds in partner_bounds.values()]
+        placed_on: dict[int, int] = {}
+
+        def place(l: int, visited: set[int]) -> bool:
+            for p in candidates[l]:
+                if p not in visited:
+                    visited.add(p)
+                    if p not in placed_on or place(placed_on[p], visited):
+                        placed_on[p] = l
+                        return True
+            return False
+
+        return all(place(l, set()) for l in range(len(candidates)))
+
+    highest = max(max(bounds[1:]) for bounds in pair_bounds.values())
+    bound = depth
+    while bound < highest and not placeable(bound):
+        bound += 1
+    return bound
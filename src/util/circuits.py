@@ -1,8 +1,21 @@
 import math
 from qiskit import QuantumCircuit, QuantumRegister, qasm2
-from qiskit.circuit import Qubit, Instruction, CircuitInstruction
+from qiskit.circuit import Qubit, Instruction, CircuitInstruction, Gate
 from itertools import takewhile
 
+# the name of a gate standing for a run of unary gates, see `compress_unary_runs`
+UNARY_BLOCK = "block"
+
+# Number of layers a SWAP occupies both of its qubits for: it is decomposed into three CX
+# gates. The SAT encoding, the router and the depth bounds all follow it.
+SWAP_LAYERS = 3
+
+# unary gates that are diagonal in the Z basis, like the control of a CX gate, and in the
+# X basis, like its target; gates that are diagonal in the same basis on every qubit they
+# share commute
+Z_DIAGONAL_GATES = ("z", "s", "sdg", "t", "tdg", "rz", "u1", "p")
+X_DIAGONAL_GATES = ("x", "sx", "sxdg", "rx")
+
 
 class LogicalQubit:
     def __init__(self, id: int):
@@ -57,6 +70,17 @@ class SynthesizerNoSolution(SynthesizerOutput):
 
 
 class SynthesizerSolution(SynthesizerOutput):
+    """
+    A synthesized circuit. A solution that is not proven optimal, e.g. the best one
+    found before a timeout, carries the proven lower bound on the optimized (CX-)depth,
+    the relative gap between its (CX-)depth and that bound and, with SWAP optimization,
+    the proven lower bound on the number of SWAPs. A solution synthesized in windows
+    carries the number of gates kept from every window, the depth it was solved with and
+    the lower bound proven on that depth. A solution merged from components carries the
+    disjoint regions they were solved on, as it is only optimal within them. The depths
+    searched are listed with whether they have a solution and the solver time they took.
+    """
+
     __match_args__ = ("circuit", "initial_mapping", "time")
 
     def __init__(
@@ -67,6 +91,12 @@ class SynthesizerSolution(SynthesizerOutput):
         depth: int,
         cx_depth: int,
         swaps: int,
+        lower_bound: int | None = None,
+        gap: float | None = None,
+        swap_lower_bound: int | None = None,
+        windows: list[tuple[int, int, int]] | None = None,
+        depth_times: list[tuple[int, bool, float]] | None = None,
+        regions: list[list[int]] | None = None,
     ):
         self.circuit = circuit
         self.initial_mapping = mapping
@@ -76,6 +106,12 @@ class SynthesizerSolution(SynthesizerOutput):
         self.depth = depth
         self.cx_depth = cx_depth
         self.swaps = swaps
+        self.lower_bound = lower_bound
+        self.gap = gap
+        self.swap_lower_bound = swap_lower_bound
+        self.windows = windows
+        self.depth_times = depth_times
+        self.regions = regions
 
     def __str__(self):
         initial_mapping_str = "\n  ".join(
@@ -84,7 +120,26 @@ class SynthesizerSolution(SynthesizerOutput):
                 for logical, physical in self.initial_mapping.items()
             )
         )
-        return f"Done!\n{self.circuit}\nDepth: {self.depth}, CX-depth: {self.cx_depth}, SWAPs: {self.swaps}\nInitial mapping: \n  {initial_mapping_str}\n"
+        bounds_str = ""
+        if self.gap:
+            bounds_str += f"Not proven optimal: lower bound {self.lower_bound} on the optimized depth, gap {self.gap:.1%}\n"
+        if self.swap_lower_bound is not None and self.swap_lower_bound < self.swaps:
+            bounds_str += f"Not proven SWAP-optimal: lower bound {self.swap_lower_bound} on the SWAPs\n"
+        for i, (gates, depth, lower_bound) in enumerate(self.windows or []):
+            status = (
+                "optimal"
+                if lower_bound == depth
+                else f"not proven optimal, lower bound {lower_bound}"
+            )
+            bounds_str += f"Window {i + 1}: {gates} gates, depth {depth} ({status})\n"
+        if self.regions and (
+            self.gap
+            or self.swap_lower_bound is not None
+            and self.swap_lower_bound < self.swaps
+        ):
+            regions_str = " | ".join(", ".join(map(str, r)) for r in self.regions)
+            bounds_str += f"Components solved on disjoint regions (physical qubits {regions_str}), optimal only within them\n"
+        return f"Done!\n{self.circuit}\nDepth: {self.depth}, CX-depth: {self.cx_depth}, SWAPs: {self.swaps}\n{bounds_str}Initial mapping: \n  {initial_mapping_str}\n"
 
     def report_time(self):
         time_str = (
@@ -92,6 +147,12 @@ class SynthesizerSolution(SynthesizerOutput):
             if self.optional_times == None
             else f"Solver time for optimal depth: {self.optional_times[0]:.3f} seconds.\nSolver time for optimal SWAPs: {self.optional_times[1]:.3f} seconds.\nTotal solver time: {self.solver_time:.3f} seconds.\nTotal time (including preprocessing): {self.total_time:.3f} seconds."
         )
+        if self.depth_times:
+            depths_str = ", ".join(
+                f"{depth} {'✓' if sat else '✗'} {seconds:.3f}s"
+                for depth, sat, seconds in self.depth_times
+            )
+            time_str += f"\nSolver time per depth: {depths_str}."
         return time_str
 
 
@@ -158,9 +219,61 @@ def gate_line_dependency_mapping(
     return mapping
 
 
-def gate_direct_dependency_mapping(circuit: QuantumCircuit) -> dict[int, list[int]]:
+def line_commutation_groups(
+    circuit: QuantumCircuit, commutation: bool = True
+) -> dict[int, list[list[int]]]:
+    """
+    Returns a mapping of qubits to the gates on that qubit in order, grouped into runs of
+    consecutive gates that are diagonal in the same basis on it (see `Z_DIAGONAL_GATES`).
+    The gates of a group can be executed in any order relative to each other, but not
+    together with a gate of another group in between. Without commutation, every gate is
+    a group of its own.
+
+    Example
+    -------
+    Given circuit:
+                   ┌───┐
+    q_0: ──■────■──┤ H ├
+         ┌─┴─┐  │  └───┘
+    q_1: ┤ X ├──┼───────
+         └───┘┌─┴─┐
+    q_2: ─────┤ X ├─────
+              └───┘
+
+    The mapping would be:
+    `{0: [[0, 1], [2]], 1: [[0]], 2: [[1]]}`
+    """
+    mapping: dict[int, list[list[int]]] = {}
+    bases: dict[int, str | None] = {}
+    for gate, instr in enumerate(circuit.data):
+        name = instr.operation.name
+        lines = [qubit._index for qubit in instr.qubits]
+        if name == "cx":
+            gate_bases = ["z", "x"]
+        elif name in Z_DIAGONAL_GATES:
+            gate_bases = ["z"]
+        elif name in X_DIAGONAL_GATES:
+            gate_bases = ["x"]
+        else:
+            gate_bases = [None] * len(lines)
+        for line, basis in zip(lines, gate_bases):
+            groups = mapping.setdefault(line, [])
+            if commutation and groups and basis is not None and bases[line] == basis:
+                groups[-1].append(gate)
+            else:
+                groups.append([gate])
+            bases[line] = basis
+
+    return mapping
+
+
+def gate_direct_dependency_mapping(
+    circuit: QuantumCircuit, commutation: bool = False
+) -> dict[int, list[int]]:
     """
     Returns a mapping of gate index to the indices of the gates that it directly depends on.
+    With commutation, a gate only depends on the gates of the previous commutation group on
+    each of its qubits (see `line_commutation_groups`).
 
     The algorithm is O(n^2) and it works like this:
     - It calculates the line dependency mapping.
@@ -184,6 +297,17 @@ def gate_direct_dependency_mapping(circuit: QuantumCircuit) -> dict[int, list[in
     The mapping would be:
     `{4: [2], 3: [1, 0], 2: [], 1: [], 0: []}`
     """
+    if commutation:
+        dependencies: dict[int, set[int]] = {i: set() for i in range(len(circuit.data))}
+        for groups in line_commutation_groups(circuit).values():
+            for before, group in zip(groups, groups[1:]):
+                for gate in group:
+                    dependencies[gate].update(before)
+        return {
+            i: sorted(dependencies[i], reverse=True)
+            for i in range(len(dependencies) - 1, -1, -1)
+        }
+
     line_dependency_mapping = gate_line_dependency_mapping(circuit)
 
     mapping = {}
@@ -206,11 +330,13 @@ def gate_direct_dependency_mapping(circuit: QuantumCircuit) -> dict[int, list[in
     return mapping
 
 
-def gate_dependency_mapping(circuit: QuantumCircuit) -> dict[int, list[int]]:
+def gate_dependency_mapping(
+    circuit: QuantumCircuit, commutation: bool = False
+) -> dict[int, list[int]]:
     """
     Returns a mapping of gate index to the indices of the gates that it depends on.
     """
-    direct_dependency_mapping = gate_direct_dependency_mapping(circuit)
+    direct_dependency_mapping = gate_direct_dependency_mapping(circuit, commutation)
     dependency_mapping: dict[int, set[int]] = {}
     for i in range(len(direct_dependency_mapping)):
         if direct_dependency_mapping[i] == []:
@@ -225,9 +351,13 @@ def gate_dependency_mapping(circuit: QuantumCircuit) -> dict[int, list[int]]:
     return {gate: list(deps) for gate, deps in dependency_mapping.items()}
 
 
-def gate_direct_successor_mapping(circuit: QuantumCircuit) -> dict[int, list[int]]:
+def gate_direct_successor_mapping(
+    circuit: QuantumCircuit, commutation: bool = False
+) -> dict[int, list[int]]:
     """
     Returns a mapping of gate index to the indices of the gates that directly depend on it.
+    With commutation, these are the gates of the next commutation group on each of its
+    qubits (see `line_commutation_groups`).
 
     The algorithm is O(n^2) and it works like this:
     - It calculates the line dependency mapping.
@@ -251,6 +381,14 @@ def gate_direct_successor_mapping(circuit: QuantumCircuit) -> dict[int, list[int
     The mapping would be:
     `{0: [3], 1: [3], 2: [4], 3: [], 4: []}`
     """
+    if commutation:
+        dependency_mapping = gate_direct_dependency_mapping(circuit, commutation)
+        successors: dict[int, list[int]] = {i: [] for i in range(len(circuit.data))}
+        for gate in range(len(circuit.data)):
+            for dep in dependency_mapping[gate]:
+                successors[dep].append(gate)
+        return successors
+
     line_dependency_mapping = gate_line_dependency_mapping(circuit)
 
     mapping = {}
@@ -273,11 +411,13 @@ def gate_direct_successor_mapping(circuit: QuantumCircuit) -> dict[int, list[int
     return mapping
 
 
-def gate_successor_mapping(circuit: QuantumCircuit) -> dict[int, list[int]]:
+def gate_successor_mapping(
+    circuit: QuantumCircuit, commutation: bool = False
+) -> dict[int, list[int]]:
     """
     Returns a mapping of gate index to the indices of the gates that depend on it.
     """
-    direct_successor_mapping = gate_direct_successor_mapping(circuit)
+    direct_successor_mapping = gate_direct_successor_mapping(circuit, commutation)
     successor_mapping: dict[int, set[int]] = {}
     for i in range(len(direct_successor_mapping) - 1, -1, -1):
         if direct_successor_mapping[i] == []:
@@ -292,6 +432,97 @@ def gate_successor_mapping(circuit: QuantumCircuit) -> dict[int, list[int]]:
     return {gate: list(deps) for gate, deps in successor_mapping.items()}
 
 
+def gate_duration_mapping(circuit: QuantumCircuit) -> dict[int, int]:
+    """
+    Returns a mapping of gate index to the number of consecutive layers the gate occupies:
+    the number of gates in a block made by `compress_unary_runs` and 1 for any other gate.
+    """
+    return {
+        i: (
+            len(instr.operation.definition.data)
+            if instr.operation.name == UNARY_BLOCK
+            else 1
+        )
+        for i, instr in enumerate(circuit.data)
+    }
+
+
+def gate_asap_mapping(
+    circuit: QuantumCircuit, commutation: bool = False
+) -> dict[int, int]:
+    """
+    Returns a mapping of gate index to the earliest layer the gate can be executed in,
+    i.e. the length of the longest chain of gates that it depends on, where a block of
+    unary gates counts as the number of gates in it.
+
+    Example
+    -------
+    Given circuit:
+         ┌───┐
+    q_0: ┤ X ├──■──
+         ├───┤┌─┴─┐
+    q_1: ┤ X ├┤ X ├
+         └───┘├───┤
+    q_2: ──■──┤ X ├
+         ┌─┴─┐└───┘
+    q_3: ┤ X ├─────
+         └───┘
+
+    The mapping would be:
+    `{0: 0, 1: 0, 2: 0, 3: 1, 4: 1}`
+    """
+    direct_dependency_mapping = gate_direct_dependency_mapping(circuit, commutation)
+    durations = gate_duration_mapping(circuit)
+    mapping: dict[int, int] = {}
+    # gates only depend on gates with a smaller index
+    for i in range(len(direct_dependency_mapping)):
+        mapping[i] = max(
+            (mapping[dep] + durations[dep] for dep in direct_dependency_mapping[i]),
+            default=0,
+        )
+
+    return mapping
+
+
+def gate_alap_mapping(
+    circuit: QuantumCircuit, depth: int | None = None, commutation: bool = False
+) -> dict[int, int]:
+    """
+    Returns a mapping of gate index to the latest layer the gate can be executed in if the
+    circuit is to have the given depth (by default its own depth), i.e. the depth minus the
+    length of the longest chain of gates that starts with the gate, where a block of unary
+    gates counts as the number of gates in it.
+
+    Example
+    -------
+    Given circuit:
+         ┌───┐
+    q_0: ┤ X ├──■──
+         ├───┤┌─┴─┐
+    q_1: ┤ X ├┤ X ├
+         └───┘├───┤
+    q_2: ──■──┤ X ├
+         ┌─┴─┐└───┘
+    q_3: ┤ X ├─────
+         └───┘
+
+    The mapping would be:
+    `{0: 0, 1: 0, 2: 0, 3: 1, 4: 1}`
+    """
+    direct_successor_mapping = gate_direct_successor_mapping(circuit, commutation)
+    durations = gate_duration_mapping(circuit)
+    heights: dict[int, int] = {}
+    # gates are only depended on by gates with a larger index
+    for i in range(len(direct_successor_mapping) - 1, -1, -1):
+        heights[i] = durations[i] + max(
+            (heights[suc] for suc in direct_successor_mapping[i]), default=0
+        )
+
+    if depth is None:
+        depth = max(heights.values(), default=0)
+    return {gate: depth - heights[gate] for gate in range(len(heights))}
+
+
 def remove_all_non_cx_gates(circuit: QuantumCircuit) -> QuantumCircuit:
     """
     Remove all non-CX gates from the circuit.
@@ -306,6 +537,18 @@ def remove_all_non_cx_gates(circuit: QuantumCircuit) -> QuantumCircuit:
     return new_circuit
 
 
+def remove_barriers(circuit: QuantumCircuit) -> QuantumCircuit:
+    """
+    Remove all barriers from the circuit.
+    """
+    new_circuit = circuit.copy_empty_like()
+    for instr in circuit.data:
+        if instr.operation.name != "barrier":
+            new_circuit.append(instr)
+
+    return new_circuit
+
+
 def remove_all_non_swap_gates(circuit: QuantumCircuit) -> QuantumCircuit:
     """
     Remove all non-SWAP gates from the circuit.
@@ -320,6 +563,58 @@ def remove_all_non_swap_gates(circuit: QuantumCircuit) -> QuantumCircuit:
     return new_circuit
 
 
+def compress_unary_runs(circuit: QuantumCircuit) -> QuantumCircuit:
+    """
+    Replaces every run of two or more consecutive unary gates on a qubit with a single gate
+    named 'block' whose definition holds the run. The block stands for that many
+    consecutive layers (see `gate_duration_mapping`), so the gates of a run stay back to
+    back. Parsing a solution turns the blocks back into their gates.
+
+    Example
+    -------
+    Given circuit:
+         ┌───┐┌───┐     ┌───┐
+    q_0: ┤ H ├┤ T ├──■──┤ X ├
+         └───┘└───┘┌─┴─┐└───┘
+    q_1: ──────────┤ X ├─────
+                   └───┘
+
+    The result would be:
+         ┌───────┐     ┌───┐
+    q_0: ┤ block ├──■──┤ X ├
+         └───────┘┌─┴─┐└───┘
+    q_1: ─────────┤ X ├─────
+                  └───┘
+    """
+    compressed = QuantumCircuit(*circuit.qregs)
+    runs: dict[int, list[CircuitInstruction]] = {}
+
+    def flush(line: int):
+        run = runs.pop(line, [])
+        if len(run) == 1:
+            compressed.append(run[0])
+        elif len(run) > 1:
+            definition = QuantumCircuit(1)
+            for instr in run:
+                definition.append(instr.operation, [0])
+            block = definition.to_gate()
+            block.name = UNARY_BLOCK
+            compressed.append(block, run[0].qubits)
+
+    for instr in circuit.data:
+        lines = [qubit._index for qubit in instr.qubits]
+        if len(lines) == 1 and isinstance(instr.operation, Gate):
+            runs.setdefault(lines[0], []).append(instr)
+            continue
+        for line in lines:
+            flush(line)
+        compressed.append(instr)
+    for line in list(runs.keys()):
+        flush(line)
+
+    return compressed
+
+
 def line_gate_mapping(
     circuit: QuantumCircuit,
 ) -> dict[int, list[tuple[int, str]]]:
@@ -363,6 +658,18 @@ def line_gate_mapping(
     return mapping
 
 
+def check_commutation(commutation: bool, cx_optimal: bool):
+    """
+    Raises a `ValueError` if commuting gates may be reordered while the CX-depth is
+    optimized, as the unary gates are reinserted in their original order then (see
+    `reinsert_unary_gates`).
+    """
+    if commutation and cx_optimal:
+        raise ValueError(
+            "Commuting gates cannot be reordered when optimizing the CX-depth, as the unary gates are reinserted in their original order."
+        )
+
+
 def reinsert_unary_gates(
     original_circuit: QuantumCircuit,
     cx_circuit: QuantumCircuit,
@@ -683,3 +990,100 @@ def get_lq_pairs(circuit: QuantumCircuit) -> list[tuple[int, int]]:
         if instr[0].name == "cx":
             lq_pairs.append((instr[1][0]._index, instr[1][1]._index))
     return lq_pairs
+
+
+def lq_interaction_mapping(
+    circuit: QuantumCircuit, commutation: bool = False
+) -> dict[tuple[int, int], tuple[list[int], int, int]]:
+    """
+    Returns a mapping of each pair of logical qubits that share a CX gate to the indices of
+    the CX gates on that pair and the first and the last of their earliest layers.
+
+    Pairs are unordered and given as `(l, l')` with `l < l'`, so every pair occurs once no
+    matter how many CX gates act on it or in which direction.
+
+    Example
+    -------
+    Given circuit:
+              ┌───┐
+    q_0: ──■──┤ X ├──■──
+         ┌─┴─┐└─┬─┘  │
+    q_1: ┤ X ├──■────┼──
+         └───┘     ┌─┴─┐
+    q_2: ──────────┤ X ├
+                   └───┘
+
+    The mapping would be:
+    `{(0, 1): ([0, 1], 0, 1), (0, 2): ([2], 2, 2)}`
+    """
+    gate_line_mapping = gate_line_dependency_mapping(circuit)
+    asap_mapping = gate_asap_mapping(circuit, commutation)
+
+    gates: dict[tuple[int, int], list[int]] = {}
+    for gate, (name, lines) in gate_line_mapping.items():
+        if name == "cx":
+            pair = (min(lines), max(lines))
+            gates.setdefault(pair, []).append(gate)
+
+    return {
+        pair: (
+            pair_gates,
+            min(asap_mapping[gate] for gate in pair_gates),
+            max(asap_mapping[gate] for gate in pair_gates),
+        )
+        for pair, pair_gates in gates.items()
+    }
+
+
+def interaction_components(circuit: QuantumCircuit) -> list[list[int]]:
+    """
+    Returns the groups of logical qubits that never share a CX gate with a qubit of
+    another group, i.e. the connected components of the interaction graph, largest
+    first. The qubits without CX gates form one group of their own.
+
+    Example
+    -------
+    Given circuit:
+              ┌───┐
+    q_0: ──■──┤ X ├
+         ┌─┴─┐└───┘
+    q_1: ┤ X ├─────
+         └───┘
+    q_2: ──■───────
+         ┌─┴─┐
+    q_3: ┤ X ├─────
+         ├───┤
+    q_4: ┤ X ├─────
+         └───┘
+
+    The groups would be:
+    `[[0, 1], [2, 3], [4]]`
+    """
+    neighbours: dict[int, set[int]] = {l: set() for l in range(circuit.num_qubits)}
+    for l, l_prime in lq_interaction_mapping(circuit):
+        neighbours[l].add(l_prime)
+        neighbours[l_prime].add(l)
+
+    components = []
+    lonely = []
+    seen: set[int] = set()
+    for l in neighbours:
+        if l in seen:
+            continue
+        if not neighbours[l]:
+            lonely.append(l)
+            continue
+        component = []
+        frontier = [l]
+        seen.add(l)
+        while frontier:
+            l_prime = frontier.pop()
+            component.append(l_prime)
+            for l_second in neighbours[l_prime]:
+                if l_second not in seen:
+                    seen.add(l_second)
+                    frontier.append(l_second)
+        components.append(sorted(component))
+    if lonely:
+        components.append(lonely)
+    return sorted(components, key=len, reverse=True)
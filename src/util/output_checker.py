@@ -1,6 +1,7 @@
 from util.circuits import (
     PhysicalQubit,
     LogicalQubit,
+    gate_direct_dependency_mapping,
     gate_line_dependency_mapping,
     line_gate_mapping,
     remove_all_non_cx_gates,
@@ -42,7 +43,13 @@ def equality_check(
     output_circuit: QuantumCircuit,
     initial_mapping: dict[LogicalQubit, PhysicalQubit],
     ancillaries: bool,
+    commutation: bool = False,
 ) -> bool:
+    """
+    Checks that the output circuit executes the gates of the input circuit on the mapped
+    qubits, in an order that respects the dependencies of the input circuit, with
+    commutation those between gates that do not commute.
+    """
     output_mapping = line_gate_mapping(output_circuit)
     topo_sort_gates: list[tuple[str, list[int]]] = []
     while not all(len(output_mapping[line]) == 0 for line in output_mapping.keys()):
@@ -73,8 +80,31 @@ def equality_check(
                     waiting[binary_num] = line
 
     input_mapping = line_gate_mapping(input_circuit)
+    input_lines = gate_line_dependency_mapping(input_circuit)
+    input_dependencies = gate_direct_dependency_mapping(input_circuit, commutation)
+    executed: set[int] = set()
     reverse_initial: dict[int, int] = {p.id: l.id for l, p in initial_mapping.items()}
 
+    def execute(name: str, lines: list[int]) -> bool:
+        """
+        Marks the first gate of the input on the lines whose dependencies are executed
+        and that is of the given type on the same lines as executed. Without
+        commutation, this can only be the next gate on each of the lines.
+        """
+        for gate, _ in input_mapping[lines[0]]:
+            if (
+                all(dep in executed for dep in input_dependencies[gate])
+                and input_lines[gate][0] == name
+                and input_lines[gate][1] == lines
+            ):
+                executed.add(gate)
+                for line in lines:
+                    input_mapping[line] = [
+                        entry for entry in input_mapping[line] if entry[0] != gate
+                    ]
+                return True
+        return False
+
     for phys_gate_name, phys_lines in topo_sort_gates:
         binary = len(phys_lines) == 2
         if binary:
@@ -103,31 +133,15 @@ def equality_check(
             logi_control_gates = input_mapping[logi_control]
             logi_target_gates = input_mapping[logi_target]
 
+            if execute("cx", [logi_control, logi_target]):
+                continue
             if logi_control_gates and logi_target_gates:
                 _, logi_control_gate_name = logi_control_gates[0]
                 _, logi_target_gate_name = logi_target_gates[0]
-
-                logi_names_equiv = logi_control_gate_name.startswith(
-                    "cx0"
-                ) and logi_target_gate_name.startswith("cx1")
-                if logi_names_equiv:
-                    phys_logi_names_equiv = phys_gate_name.startswith(
-                        "cx"
-                    ) and logi_control_gate_name.startswith("cx")
-                    if phys_logi_names_equiv:
-                        input_mapping[logi_target] = input_mapping[logi_target][1:]
-                        input_mapping[logi_control] = input_mapping[logi_control][1:]
-                        continue
-                    else:
-                        print(
-                            f"Types of gates do not match: {phys_gate_name} (on p_{phys_control} and p_{phys_target}) and {logi_control_gate_name} (on q_{logi_control} and q_{logi_target})."
-                        )
-                        return False
-                else:
-                    print(
-                        f"Expected {phys_gate_name} at q_{logi_control} (p_{phys_control}) and q_{logi_target} (p_{phys_target}), but found {logi_control_gate_name} and {logi_target_gate_name}."
-                    )
-                    return False
+                print(
+                    f"Expected {phys_gate_name} at q_{logi_control} (p_{phys_control}) and q_{logi_target} (p_{phys_target}), but found {logi_control_gate_name} and {logi_target_gate_name}."
+                )
+                return False
             else:
                 if not logi_control_gates:
                     print(
@@ -143,17 +157,14 @@ def equality_check(
             phys_line = phys_lines[0]
             logi_line = reverse_initial[phys_line]
             logi_gates = input_mapping[logi_line]
+            if execute(phys_gate_name, [logi_line]):
+                continue
             if logi_gates:
                 _, logi_gate_name = logi_gates[0]
-                names_equiv = phys_gate_name == logi_gate_name
-                if names_equiv:
-                    input_mapping[logi_line] = input_mapping[logi_line][1:]
-                    continue
-                else:
-                    print(
-                        f"Types of gates do not match: {phys_gate_name} (on p_{phys_line}) and {logi_gate_name} (on q_{logi_line})."
-                    )
-                    return False
+                print(
+                    f"Types of gates do not match: {phys_gate_name} (on p_{phys_line}) and {logi_gate_name} (on q_{logi_line})."
+                )
+                return False
             else:
                 print(
                     f"Expected a {phys_gate_name} gate on q_{logi_line}, but found nothing."
@@ -0,0 +1,442 @@
+from qiskit import QuantumCircuit
+from platforms import Platform
+from util.circuits import (
+    gate_alap_mapping,
+    gate_asap_mapping,
+    gate_direct_dependency_mapping,
+    gate_duration_mapping,
+    gate_line_dependency_mapping,
+    lq_interaction_mapping,
+    SWAP_LAYERS,
+)
+import rustworkx
+
+# The most states the VF2 search for an embedding visits before it gives up.
+EMBEDDING_CALL_LIMIT = 1_000_000
+
+
+class RoutedCircuit:
+    """
+    A schedule of the gates of a circuit and the SWAPs inserted to route it, in the
+    layers of the SAT encoding: a SWAP in layer `t` occupies its qubits in the
+    `SWAP_LAYERS` layers up to `t` and the mapping of layer `t` is the one after it.
+
+    - mappings (`list[list[int]]`): The physical qubit of every logical qubit per layer.
+    - gate_layers (`dict[int, int]`): The layer every gate is executed in.
+    - swaps (`list[tuple[int, int, int]]`): The layer and physical qubits `p < p'` of
+      every SWAP.
+    """
+
+    def __init__(
+        self,
+        mappings: list[list[int]],
+        gate_layers: dict[int, int],
+        swaps: list[tuple[int, int, int]],
+    ):
+        self.mappings = mappings
+        self.gate_layers = gate_layers
+        self.swaps = swaps
+
+    @property
+    def depth(self) -> int:
+        return len(self.mappings)
+
+    def relabelled(self, permutation: list[int]) -> "RoutedCircuit":
+        """The same schedule with every physical qubit `p` replaced by `permutation[p]`."""
+        return RoutedCircuit(
+            [[permutation[p] for p in mapping] for mapping in self.mappings],
+            self.gate_layers,
+            [
+                (
+                    s,
+                    min(permutation[p], permutation[p_prime]),
+                    max(permutation[p], permutation[p_prime]),
+                )
+                for s, p, p_prime in self.swaps
+            ],
+        )
+
+    def solution(self) -> list[str]:
+        """
+        The schedule as the names of the true atoms of a SAT solution, in the order of
+        the atoms in a layer: mapped, then SWAPs, then gates.
+        """
+        names = []
+        for t, mapping in enumerate(self.mappings):
+            names.extend(f"m^{t}_{l};{p}" for l, p in enumerate(mapping))
+            names.extend(
+                f"s^{t}_{p};{p_prime}" for s, p, p_prime in self.swaps if s == t
+            )
+            names.extend(
+                f"c^{t}_{gate}"
+                for gate, layer in sorted(self.gate_layers.items())
+                if layer == t
+            )
+        return names
+
+
+def connected_region(
+    platform: Platform, size: int, available: set[int] | None = None
+) -> list[int] | None:
+    """
+    A connected set of `size` physical qubits among the available ones (all by default),
+    grown from a qubit of highest degree by repeatedly adding the qubit with the most
+    neighbours in the set, and of those the closest to the first qubit, or `None` if
+    there is none.
+    """
+    if available is None:
+        available = set(range(platform.qubits))
+    if not available:
+        return None
+    neighbours: dict[int, set[int]] = {p: set() for p in available}
+    for p, p_prime in platform.connectivity_graph:
+        if p in available and p_prime in available:
+            neighbours[p].add(p_prime)
+
+    seed = max(sorted(available), key=lambda p: len(neighbours[p]))
+    # ties are broken towards the seed, so that the region grows compact
+    distance = {seed: 0}
+    frontier = [seed]
+    while frontier:
+        p = frontier.pop(0)
+        for p_prime in sorted(neighbours[p]):
+            if p_prime not in distance:
+                distance[p_prime] = distance[p] + 1
+                frontier.append(p_prime)
+
+    region = [seed]
+    while len(region) < size:
+        frontier = {p for q in region for p in neighbours[q]} - set(region)
+        if not frontier:
+            return None
+        region.append(
+            max(
+                sorted(frontier),
+                key=lambda p: (len(neighbours[p].intersection(region)), -distance[p]),
+            )
+        )
+    return region
+
+
+def disjoint_regions(platform: Platform, sizes: list[int]) -> list[list[int]] | None:
+    """
+    Disjoint connected regions of the given sizes, carved out of the platform one after
+    the other (see `connected_region`), or `None` if they do not fit.
+    """
+    available = set(range(platform.qubits))
+    regions = []
+    for size in sizes:
+        region = connected_region(platform, size, available)
+        if region is None:
+            return None
+        available.difference_update(region)
+        regions.append(region)
+    return regions
+
+
+def region_distances(
+    platform: Platform, region: list[int]
+) -> tuple[dict[int, list[int]], dict[int, dict[int, int]]]:
+    """The neighbours and the lengths of shortest paths within a region of a platform."""
+    neighbours: dict[int, list[int]] = {p: [] for p in region}
+    for p, p_prime in platform.connectivity_graph:
+        if p in neighbours and p_prime in neighbours:
+            neighbours[p].append(p_prime)
+
+    distances: dict[int, dict[int, int]] = {}
+    for source in region:
+        distance = {source: 0}
+        frontier = [source]
+        while frontier:
+            next_frontier = []
+            for p in frontier:
+                for p_prime in neighbours[p]:
+                    if p_prime not in distance:
+                        distance[p_prime] = distance[p] + 1
+                        next_frontier.append(p_prime)
+            frontier = next_frontier
+        distances[source] = distance
+    return neighbours, distances
+
+
+def initial_mapping(
+    circuit: QuantumCircuit,
+    region: list[int],
+    neighbours: dict[int, list[int]],
+    distances: dict[int, dict[int, int]],
+) -> list[int]:
+    """
+    Places the logical qubits on a region, the qubits that interact the most first, each
+    as close as possible to the qubits it interacts with.
+    """
+    lq = list(range(circuit.num_qubits))
+    weights: dict[tuple[int, int], int] = {}
+    for name, lines in gate_line_dependency_mapping(circuit).values():
+        if name == "cx":
+            pair = (min(lines), max(lines))
+            weights[pair] = weights.get(pair, 0) + 1
+
+    def weight(l: int, l_prime: int) -> int:
+        return weights.get((min(l, l_prime), max(l, l_prime)), 0)
+
+    position: dict[int, int] = {}
+    free = list(region)
+    unplaced = sorted(lq, key=lambda l: -sum(weight(l, other) for other in lq))
+    while unplaced:
+        l = max(
+            unplaced,
+            key=lambda l: sum(weight(l, placed) for placed in position),
+        )
+        unplaced.remove(l)
+        p = min(
+            free,
+            key=lambda p: sum(
+                weight(l, placed) * distances[p][position[placed]]
+                for placed in position
+            )
+            - len(neighbours[p]) / (len(region) + 1),
+        )
+        free.remove(p)
+        position[l] = p
+    return [position[l] for l in lq]
+
+
+def schedule(
+    circuit: QuantumCircuit,
+    mapping: list[int],
+    neighbours: dict[int, list[int]],
+    distances: dict[int, dict[int, int]],
+    commutation: bool = False,
+) -> RoutedCircuit:
+    """
+    Schedules the circuit from an initial mapping, layer by layer.
+
+    In every layer, all gates whose predecessors are done and whose qubits are free are
+    executed, a block of unary gates keeping its qubit busy for as many layers as it holds
+    gates. For every CX gate that is blocked because its qubits are not adjacent, most
+    critical first, a SWAP is started on one of its qubits that brings them closer,
+    preferring SWAPs that also bring the other swapped qubit closer to its next CX
+    partner. SWAPs never touch the qubits of more critical blocked gates, so the most
+    critical one always makes progress.
+
+    With commutation, gates only wait for the gates they do not commute with (see
+    `gate_direct_dependency_mapping`).
+    """
+    gate_line_map = gate_line_dependency_mapping(circuit)
+    gate_pre_map = gate_direct_dependency_mapping(circuit, commutation)
+    # the gate with the earliest latest layer is the most critical
+    gate_alap = gate_alap_mapping(circuit, commutation=commutation)
+    durations = gate_duration_mapping(circuit)
+    lq = list(range(circuit.num_qubits))
+
+    # the CX gates on each line, in order
+    cx_gates: dict[int, list[int]] = {l: [] for l in lq}
+    for gate, (name, lines) in gate_line_map.items():
+        if name == "cx":
+            for l in lines:
+                cx_gates[l].append(gate)
+
+    position = dict(enumerate(mapping))
+    logical_at = {p: l for l, p in position.items()}
+
+    pending = set(gate_line_map.keys())
+    gate_layers: dict[int, int] = {}
+    next_cx = {l: 0 for l in lq}
+    busy_until = {p: -1 for p in neighbours}
+    swaps: list[tuple[int, int, int]] = []
+    mappings: list[list[int]] = []
+
+    def partner(l: int) -> int | None:
+        """The partner of the next CX gate of a logical qubit."""
+        while next_cx[l] < len(cx_gates[l]) and cx_gates[l][next_cx[l]] in gate_layers:
+            next_cx[l] += 1
+        if next_cx[l] == len(cx_gates[l]):
+            return None
+        _, (first, second) = gate_line_map[cx_gates[l][next_cx[l]]]
+        return second if first == l else first
+
+    t = 0
+    # the first layer after the last gate that has been executed
+    finish = 0
+    while pending or t < finish:
+        for s, p, p_prime in swaps:
+            if s == t:
+                l, l_prime = logical_at[p], logical_at[p_prime]
+                logical_at[p], logical_at[p_prime] = l_prime, l
+                position[l], position[l_prime] = p_prime, p
+        mappings.append([position[l] for l in lq])
+
+        used: set[int] = set()
+        blocked: list[int] = []
+        ready = [
+            gate
+            for gate in pending
+            if all(
+                pre in gate_layers and gate_layers[pre] + durations[pre] <= t
+                for pre in gate_pre_map[gate]
+            )
+        ]
+        for gate in sorted(ready, key=lambda gate: (gate_alap[gate], gate)):
+            name, lines = gate_line_map[gate]
+            positions = [position[l] for l in lines]
+            if any(busy_until[p] >= t for p in positions):
+                continue
+            if name == "cx" and distances[positions[0]][positions[1]] != 1:
+                blocked.append(gate)
+                continue
+            gate_layers[gate] = t
+            used.update(positions)
+            pending.remove(gate)
+            # gates that commute are ready together but cannot share a qubit in a layer
+            for p in positions:
+                busy_until[p] = max(busy_until[p], t + durations[gate] - 1)
+            finish = max(finish, t + durations[gate])
+
+        # a SWAP started now is in layer t + 2, and none can be in the first 3 layers
+        locked: set[int] = set()
+        for i, gate in enumerate(blocked if t >= 1 else []):
+            _, lines = gate_line_map[gate]
+            best = None
+            for l, other in [(lines[0], lines[1]), (lines[1], lines[0])]:
+                p, target = position[l], position[other]
+                if busy_until[p] >= t:
+                    continue
+                for p_prime in neighbours[p]:
+                    l_prime = logical_at[p_prime]
+                    if (
+                        busy_until[p_prime] >= t
+                        or p_prime in used
+                        or l_prime in locked
+                        or distances[p_prime][target] >= distances[p][target]
+                    ):
+                        continue
+                    score = 0
+                    next_partner = partner(l_prime)
+                    if next_partner is not None and next_partner != l:
+                        partner_position = position[next_partner]
+                        score = (
+                            distances[p][partner_position]
+                            - distances[p_prime][partner_position]
+                        )
+                    if best is None or score < best[0]:
+                        best = (score, p, p_prime)
+            if best is not None:
+                _, p, p_prime = best
+                swaps.append((t + SWAP_LAYERS - 1, min(p, p_prime), max(p, p_prime)))
+                busy_until[p] = busy_until[p_prime] = t + SWAP_LAYERS - 1
+            elif i == 0 and all(busy_until[position[l]] < t for l in lines):
+                # the most critical gate must get its SWAP first
+                break
+            locked.update(lines)
+        t += 1
+
+    return RoutedCircuit(mappings, gate_layers, swaps)
+
+
+def embed(
+    circuit: QuantumCircuit, platform: Platform, commutation: bool = False
+) -> RoutedCircuit | None:
+    """
+    Places the logical qubits so that every pair sharing a CX gate is adjacent, with a
+    VF2 search for the interaction graph of the circuit in the connectivity graph of the
+    platform, and executes every gate in its earliest layer. Without SWAPs, the depth is
+    the depth of the circuit, which is optimal.
+
+    With commutation, gates that commute may be ready in the same layer while sharing a
+    qubit, so the gates are scheduled greedily instead, which need not be optimal.
+
+    Returns `None` if there is no such placement or the search gives up.
+    """
+    lq = list(range(circuit.num_qubits))
+    interactions = rustworkx.PyGraph()
+    interactions.add_nodes_from(lq)
+    interactions.add_edges_from_no_data(list(lq_interaction_mapping(circuit)))
+    connectivity = rustworkx.PyGraph()
+    connectivity.add_nodes_from(range(platform.qubits))
+    connectivity.add_edges_from_no_data(
+        [(p, p_prime) for p, p_prime in platform.connectivity_graph if p < p_prime]
+    )
+
+    embeddings = rustworkx.vf2_mapping(
+        connectivity,
+        interactions,
+        id_order=False,
+        subgraph=True,
+        induced=False,
+        call_limit=EMBEDDING_CALL_LIMIT,
+    )
+    embedding = next(embeddings, None)
+    if embedding is None:
+        return None
+    position = {l: p for p, l in embedding.items()}
+    if commutation:
+        neighbours, distances = region_distances(platform, list(range(platform.qubits)))
+        return schedule(
+            circuit, [position[l] for l in lq], neighbours, distances, commutation
+        )
+    gate_layers = gate_asap_mapping(circuit)
+    durations = gate_duration_mapping(circuit)
+    depth = max(
+        (gate_layers[gate] + durations[gate] for gate in gate_layers), default=1
+    )
+    return RoutedCircuit([[position[l] for l in lq]] * depth, gate_layers, [])
+
+
+def route(
+    circuit: QuantumCircuit,
+    platform: Platform,
+    passes: int = 3,
+    commutation: bool = False,
+) -> RoutedCircuit | None:
+    """
+    Routes the circuit on the platform with a greedy SWAP router, or returns `None` if
+    the platform has no connected region of the size of the circuit.
+
+    The logical qubits are placed on a connected region of the platform (see
+    `initial_mapping`) and the placement is refined by scheduling the circuit forwards
+    and backwards, each pass starting from the final mapping of the previous one. The
+    shallowest forward schedule is returned.
+
+    SWAPs stay within the region, so they are between occupied qubits and the result is
+    valid with and without ancillaries.
+    """
+    region = connected_region(platform, circuit.num_qubits)
+    if region is None:
+        return None
+    neighbours, distances = region_distances(platform, region)
+    # only the order matters to the router, and the gates keep their names, so blocks of
+    # unary gates keep their durations
+    reverse = QuantumCircuit(*circuit.qregs)
+    for instr in reversed(circuit.data):
+        reverse.append(instr)
+
+    mapping = initial_mapping(circuit, region, neighbours, distances)
+    best = None
+    for _ in range(passes):
+        routed = schedule(circuit, mapping, neighbours, distances, commutation)
+        if best is None or (routed.depth, len(routed.swaps)) < (
+            best.depth,
+            len(best.swaps),
+        ):
+            best = routed
+        mapping = schedule(
+            reverse, routed.mappings[-1], neighbours, distances, commutation
+        ).mappings[-1]
+    return best
+
+
+def route_from(
+    circuit: QuantumCircuit,
+    platform: Platform,
+    mapping: list[int],
+    commutation: bool = False,
+) -> RoutedCircuit | None:
+    """
+    Routes the circuit with the greedy SWAP router from a given initial mapping, with
+    SWAPs among the occupied qubits, or returns `None` if they are not connected.
+    """
+    region = sorted(set(mapping))
+    neighbours, distances = region_distances(platform, region)
+    if any(len(distances[p]) < len(region) for p in region):
+        return None
+    return schedule(circuit, mapping, neighbours, distances, commutation)
@@ -1,12 +1,94 @@
-from pysat.card import CardEnc, EncType
+import math
+import numpy as np
+from array import array
+from typing import Callable, Hashable, Iterable, Iterator, Sequence
+from pysat.card import CardEnc, EncType, ITotalizer
 
 type Atom = int
 type Clause = list[Atom]
 type Formula = list[Clause]
 
+
+class Block:
+    """
+    A contiguous range of atoms laid out as a dense array.
+
+    The atom for an index is computed arithmetically from the start of the block
+    instead of being looked up by name. Blocks are one- or two-dimensional.
+    One-dimensional blocks can be indexed by arbitrary keys (e.g. edges) through
+    `keys`, a mapping from key to position that may be shared between blocks.
+
+    Indexing a two-dimensional block with a row index gives a `range` of atoms,
+    so `block[i][j]` is the atom at row `i` and column `j`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        start: Atom,
+        shape: tuple[int, ...],
+        keys: dict[Hashable, int] | None = None,
+    ):
+        if len(shape) not in (1, 2):
+            raise ValueError(f"Blocks must be one- or two-dimensional, got {shape}.")
+        if keys is not None and len(shape) != 1:
+            raise ValueError("Only one-dimensional blocks can be keyed.")
+        self.name = name
+        self.start = start
+        self.shape = shape
+        self.size = math.prod(shape)
+        self.keys = keys
+
+    def __getitem__(self, index) -> Atom | range:
+        if self.keys is not None:
+            return self.start + self.keys[index]
+        if len(self.shape) == 1:
+            return self.start + index
+        width = self.shape[1]
+        row_start = self.start + index * width
+        return range(row_start, row_start + width)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __contains__(self, atom: Atom) -> bool:
+        return self.start <= atom < self.start + self.size
+
+    def atoms(self) -> range:
+        """All atoms of the block in layout order."""
+        return range(self.start, self.start + self.size)
+
+    def name_of(self, atom: Atom) -> str:
+        """The debug name of an atom in this block, e.g. `m^3_1;4`."""
+        offset = atom - self.start
+        if len(self.shape) == 2:
+            row, column = divmod(offset, self.shape[1])
+            return f"{self.name}_{row};{column}"
+        if self.keys is not None:
+            key = list(self.keys)[offset]
+            if isinstance(key, tuple):
+                return f"{self.name}_{';'.join(str(k) for k in key)}"
+            return f"{self.name}_{key}"
+        return f"{self.name}_{offset}"
+
+
 next_id: Atom = 1
 atoms: dict[str, Atom] = {}
 atom_names: dict[Atom, str] = {}
+blocks: list[Block] = []
+
+# Cardinality policies pick the encoding of `exactly_one` and `at_most_one` from the
+# number of atoms. Pairwise needs no auxiliary atoms but is quadratic, so larger
+# lists are better off with a linear encoding.
+CARDINALITY_POLICIES: dict[str, Callable[[int], int]] = {
+    "adaptive": lambda size: EncType.pairwise if size <= 20 else EncType.seqcounter,
+    "pairwise": lambda size: EncType.pairwise,
+    "ladder": lambda size: EncType.ladder if size > 2 else EncType.pairwise,
+    "seqcounter": lambda size: EncType.seqcounter if size > 2 else EncType.pairwise,
+    "bitwise": lambda size: EncType.bitwise if size > 2 else EncType.pairwise,
+    "cardnetwrk": lambda size: EncType.cardnetwrk if size > 2 else EncType.pairwise,
+}
+cardinality_policy: str = "adaptive"
 
 
 def get_next_id():
@@ -15,6 +97,11 @@ def get_next_id():
     return next_id - 1
 
 
+def peek_next_id() -> Atom:
+    """The id the next atom will get."""
+    return next_id
+
+
 def update_id_from(formula: Formula):
     global next_id
     for clause in formula:
@@ -26,9 +113,26 @@ def reset():
     global next_id
     global atoms
     global atom_names
+    global blocks
     next_id = 1
     atoms = {}
     atom_names = {}
+    blocks = []
+
+
+def set_cardinality_policy(policy: str):
+    """Set the policy used to pick encodings of cardinality constraints."""
+    global cardinality_policy
+    if policy not in CARDINALITY_POLICIES:
+        raise ValueError(
+            f"Unknown cardinality policy: '{policy}'. Choose one of: {', '.join(CARDINALITY_POLICIES)}"
+        )
+    cardinality_policy = policy
+
+
+def cardinality_encoding(size: int) -> int:
+    """The encoding the current policy picks for a constraint over `size` atoms."""
+    return CARDINALITY_POLICIES[cardinality_policy](size)
 
 
 def new_atom(name: str = "") -> Atom:
@@ -43,6 +147,32 @@ def new_atom(name: str = "") -> Atom:
     return id
 
 
+def new_block(name: str, *shape: int, keys: dict[Hashable, int] | None = None) -> Block:
+    """
+    Create a contiguous block of atoms with the given shape.
+
+    Atoms of named blocks are reported by `parse_sat_solution`, atoms of unnamed
+    blocks are anonymous.
+    """
+    global next_id
+    block = Block(name, next_id, shape, keys)
+    next_id += block.size
+    if name != "":
+        blocks.append(block)
+    return block
+
+
+def atom_name(atom: Atom) -> str | None:
+    """The debug name of the given atom, if it has one."""
+    atom = abs(atom)
+    if atom in atom_names:
+        return atom_names[atom]
+    for block in blocks:
+        if atom in block:
+            return block.name_of(atom)
+    return None
+
+
 def new_aux() -> Atom:
     """Create a new auxiliary atom."""
     return get_next_id()
@@ -108,16 +238,28 @@ def iff_disj(atoms: Clause, b: Atom) -> Formula:
     return left_to_right + right_to_left
 
 
-def exactly_one(atoms: list[Atom], encoding=EncType.pairwise) -> Formula:
-    """Create a formula that ensures exactly one of the given atoms is true."""
+def exactly_one(atoms: list[Atom], encoding: int | None = None) -> Formula:
+    """
+    Create a formula that ensures exactly one of the given atoms is true.
+
+    Without an explicit encoding, the current cardinality policy picks one.
+    """
+    if encoding is None:
+        encoding = cardinality_encoding(len(atoms))
     result = CardEnc.equals(atoms, bound=1, top_id=next_id - 1, encoding=encoding)
     clauses = result.clauses
     update_id_from(clauses)
     return clauses
 
 
-def at_most_one(atoms: list[Atom], encoding=EncType.pairwise) -> Formula:
-    """Create a formula that ensures at most one of the given atoms is true."""
+def at_most_one(atoms: list[Atom], encoding: int | None = None) -> Formula:
+    """
+    Create a formula that ensures at most one of the given atoms is true.
+
+    Without an explicit encoding, the current cardinality policy picks one.
+    """
+    if encoding is None:
+        encoding = cardinality_encoding(len(atoms))
     result = CardEnc.atmost(atoms, bound=1, top_id=next_id - 1, encoding=encoding)
     clauses = result.clauses
     update_id_from(clauses)
@@ -132,19 +274,249 @@ def at_most_n(n: int, atoms: list[Atom], encoding=EncType.seqcounter) -> Formula
     return clauses
 
 
-def parse_sat_solution(solution: list[Atom] | None) -> list[str] | None:
+def at_most_counter(atoms: list[Atom], bound: int) -> tuple[Formula, list[Atom]]:
+    """
+    Create a totalizer that counts the true atoms up to `bound + 1`. Returns its
+    clauses and its outputs, where `outputs[k]` is true if more than `k` atoms are.
+    Assuming `neg(outputs[k])` ensures that at most `k` atoms are true, so the bound can
+    be tightened without adding clauses.
+    """
+    global next_id
+    counter = ITotalizer(lits=atoms, ubound=bound, top_id=next_id - 1)
+    clauses, outputs = counter.cnf.clauses, counter.rhs
+    next_id = max(next_id, counter.top_id + 1)
+    counter.delete()
+    return clauses, outputs
+
+
+def lex_leq(xs: list[Atom], ys: list[Atom]) -> Formula:
+    """
+    Create a formula that ensures the assignment of `xs` is lexicographically at most
+    that of `ys`, with false before true. An auxiliary atom per position is implied by
+    the prefixes up to it being equal, and pairs of the same atom are skipped.
+    """
+    pairs = [(x, y) for x, y in zip(xs, ys) if x != y]
+    clauses: list[Clause] = []
+    equal: list[Atom] = []
+    for i, (x, y) in enumerate(pairs):
+        # the prefix before the pair is equal -> x <= y
+        clauses.append([*equal, neg(x), y])
+        if i + 1 < len(pairs):
+            prefix_equal = new_aux()
+            clauses.append([*equal, neg(x), neg(y), prefix_equal])
+            clauses.append([*equal, x, y, prefix_equal])
+            equal = [neg(prefix_equal)]
+    return clauses
+
+
+class ClauseSink:
+    """
+    Destination for clauses that are written as soon as they are generated.
+
+    The methods mirror the formula combinators above, but instead of building a
+    `Formula` they hand each clause straight to `add`, so no nested lists are
+    allocated along the way.
+    """
+
+    def __init__(self, add: Callable[[Iterable[Atom]], object]):
+        self.add = add
+
+    def clause(self, *lits: Atom):
+        """Add the disjunction of the given literals."""
+        self.add(lits)
+
+    def formula(self, f: Formula):
+        """Add every clause of the given formula."""
+        add = self.add
+        for clause in f:
+            add(clause)
+
+    def impl(self, a: Atom, b: Atom):
+        """Add the implication `a -> b`."""
+        self.add((-a, b))
+
+    def impl_conj(self, atoms: Sequence[Atom], b: Atom):
+        """Add the implication from the _conjunction_ of atoms to `b`."""
+        self.add((*[-atom for atom in atoms], b))
+
+    def impl_disj(self, atoms: Iterable[Atom], b: Atom):
+        """Add the implication from the _disjunction_ of atoms to `b`."""
+        add = self.add
+        for atom in atoms:
+            add((-atom, b))
+
+    def iff(self, a: Atom, b: Atom):
+        """Add the equivalence `a <-> b`."""
+        self.add((-a, b))
+        self.add((a, -b))
+
+    def iff_disj(self, atoms: Sequence[Atom], b: Atom):
+        """Add the equivalence between the disjunction of atoms and `b`."""
+        self.impl_disj(atoms, b)
+        self.add((*atoms, -b))
+
+    def exactly_one(self, atoms: Sequence[Atom], encoding: int | None = None):
+        """Add clauses ensuring exactly one of the given atoms is true."""
+        self.add(atoms)
+        self.at_most_one(atoms, encoding)
+
+    def at_most_one(self, atoms: Sequence[Atom], encoding: int | None = None):
+        """Add clauses ensuring at most one of the given atoms is true."""
+        if encoding is None:
+            encoding = cardinality_encoding(len(atoms))
+        if encoding == EncType.pairwise:
+            add = self.add
+            for i, a in enumerate(atoms):
+                for b in atoms[i + 1 :]:
+                    add((-a, -b))
+        else:
+            self.formula(at_most_one(list(atoms), encoding))
+
+
+class SolverSink(ClauseSink):
+    """Writes clauses directly to a pysat solver."""
+
+    def __init__(self, solver):
+        super().__init__(solver.add_clause)
+
+
+class BufferSink(ClauseSink):
+    """
+    Collects clauses in a flat integer buffer where every clause is terminated
+    by a 0, as in DIMACS.
+    """
+
+    def __init__(self):
+        self.buffer = array("i")
+        extend = self.buffer.extend
+        append = self.buffer.append
+
+        def add(clause: Iterable[Atom]):
+            extend(clause)
+            append(0)
+
+        super().__init__(add)
+
+    def clauses(self) -> Iterator[Clause]:
+        """The buffered clauses, in the order they were added."""
+        start = 0
+        buffer = self.buffer.tolist()
+        for end, lit in enumerate(buffer):
+            if lit == 0:
+                yield buffer[start:end]
+                start = end + 1
+
+    def flush(self, solver):
+        """Move the buffered clauses to the given solver."""
+        add = solver.add_clause
+        for clause in self.clauses():
+            add(clause)
+        del self.buffer[:]
+
+
+class RecordingSolver:
+    """
+    Forwards everything to a solver and keeps a copy of the clauses added to it in a
+    `BufferSink`, so that the formula can be handed to another solver later.
+    """
+
+    def __init__(self, solver):
+        self.solver = solver
+        self.recorded = BufferSink()
+
+    def add_clause(self, clause: Iterable[Atom], no_return: bool = True):
+        self.recorded.add(clause)
+        return self.solver.add_clause(clause, no_return)
+
+    def append_formula(self, formula: Iterable[Iterable[Atom]], no_return: bool = True):
+        for clause in formula:
+            self.add_clause(clause)
+
+    def __getattr__(self, name: str):
+        return getattr(self.solver, name)
+
+
+class LayerTemplate:
+    """
+    The clauses of one layer of an unrolled encoding, recorded once so that they can be
+    replayed for later layers with the same structure.
+
+    Layers are contiguous ranges of atoms given by their start ids. Every literal of
+    the recorded clauses is stored as a row `(back, sign * (offset + 1))`: the layer it
+    belongs to, counted back from the recorded layer, and its offset into that layer.
+    Clauses are terminated by a `(0, 0)` row. Replaying the template for layer `t` is
+    then a vectorized add of the start of layer `t - back` to every offset. Earlier
+    layers may have different widths, but every replayed layer must lay out its first
+    `width` atoms, including the auxiliary atoms of cardinality constraints, like the
+    recorded layer.
+    """
+
+    def __init__(self, rows: np.ndarray, width: int):
+        self.rows = rows
+        self.width = width
+        ends = np.flatnonzero(rows[:, 1] == 0)
+        begins = np.concatenate(([0], ends[:-1] + 1))
+        self.bounds = list(zip(begins.tolist(), ends.tolist()))
+
+    @classmethod
+    def record(
+        cls, buffer: array, layer_starts: Sequence[Atom], layer: int, width: int
+    ) -> "LayerTemplate":
+        """A template of the clauses of the given layer, as written by a `BufferSink`."""
+        lits = np.frombuffer(buffer, dtype=np.int32)
+        starts = np.asarray(layer_starts[: layer + 1], dtype=np.int32)
+        atoms = np.abs(lits)
+        terminators = lits == 0
+        # index of the layer each atom belongs to, terminators are kept as they are
+        owner = np.searchsorted(starts, atoms, side="right") - 1
+        owner[terminators] = layer
+        rows = np.empty((len(lits), 2), dtype=np.int32)
+        rows[:, 0] = layer - owner
+        rows[:, 1] = np.sign(lits) * (atoms - starts[owner] + 1)
+        return cls(rows, width)
+
+    @classmethod
+    def load(cls, path: str) -> "LayerTemplate":
+        """Memory-map a template saved with `save`."""
+        rows = np.load(path, mmap_mode="r")
+        return cls(rows[1:], int(rows[0, 0]))
+
+    def save(self, path: str):
+        """Save the template as a single `.npy` array with the width in the first row."""
+        header = np.array([[self.width, 0]], dtype=np.int32)
+        np.save(path, np.concatenate((header, self.rows)))
+
+    def replay(self, layer_starts: Sequence[Atom], layer: int) -> Iterator[Clause]:
+        """The recorded clauses over the atoms of the given layer."""
+        starts = np.asarray(layer_starts[: layer + 1], dtype=np.int64)
+        coded = self.rows[:, 1]
+        lits = np.sign(coded) * (starts[layer - self.rows[:, 0]] + np.abs(coded) - 1)
+        flat = lits.tolist()
+        return (flat[begin:end] for begin, end in self.bounds)
+
+
+def parse_sat_solution(
+    solution: list[Atom] | None, end: Atom | None = None
+) -> list[str] | None:
+    """
+    Returns the names of the named atoms that are true in the given model.
+
+    Names are only materialized for true atoms, since the model of a layout
+    synthesis problem is dominated by false ones. If `end` is given, only atoms
+    below it are considered, e.g. to leave out layers past a horizon.
+    """
     if solution is None:
         return None
-    result = []
-    for var in solution:
-        if var not in atom_names:
-            continue
-        if var < 0:
-            id = -var
-            result.append(f"~{atom_names[id]}")
-        else:
-            id = var
-            result.append(atom_names[id])
+    if end is not None:
+        solution = solution[: end - 1]
+    result = [atom_names[var] for var in solution if var > 0 and var in atom_names]
+    for block in blocks:
+        # pysat models list the literal of atom `i` at position `i - 1`
+        result.extend(
+            block.name_of(var)
+            for var in solution[block.start - 1 : block.start - 1 + block.size]
+            if var > 0
+        )
     return result
 
 
@@ -0,0 +1,72 @@
+import os
+import pytest
+from qiskit import QuantumCircuit
+from pysat.solvers import Glucose42
+from configs import platforms
+import synthesizers.sat.phys
+from synthesizers.sat.phys import PhysSynthesizer
+from util.bounds import depth_lower_bound
+from util.circuits import SynthesizerSolution, remove_all_non_cx_gates
+from util.logger import Logger
+
+BENCHMARKS = os.path.join(os.path.dirname(__file__), "..", "benchmarks")
+
+
+def benchmark(name: str) -> QuantumCircuit:
+    return QuantumCircuit.from_qasm_file(os.path.join(BENCHMARKS, f"{name}.qasm"))
+
+
+# optimal depths proven by the synthesizer before it searched from the lower bound
+OPTIMAL_DEPTHS = [
+    ("adder", "tenerife", 15),
+    ("toffoli", "tenerife", 11),
+    ("4mod5-v1_22", "tenerife", 15),
+    ("mod5mils_65", "tenerife", 24),
+    ("4gt13_92", "tenerife", 38),
+    ("qaoa5", "tenerife", 14),
+    ("tof_4", "melbourne", 47),
+    ("adder", "tokyo", 11),
+    ("queko/16QBT_05CYC_TFL_0", "guadalupe", 5),
+]
+
+# optimal CX-depths proven by the synthesizer
+OPTIMAL_CX_DEPTHS = [
+    ("adder", "tenerife", 10),
+    ("barenco_tof_4", "melbourne", 43),
+]
+
+
+@pytest.mark.parametrize("name, platform, depth", OPTIMAL_DEPTHS)
+def test_depth_lower_bound_is_sound(name: str, platform: str, depth: int):
+    circuit = benchmark(name)
+    bound = depth_lower_bound(circuit, platforms[platform])
+    assert circuit.depth() <= bound <= depth
+
+
+@pytest.mark.parametrize("name, platform, cx_depth", OPTIMAL_CX_DEPTHS)
+def test_cx_depth_lower_bound_is_sound(name: str, platform: str, cx_depth: int):
+    circuit = remove_all_non_cx_gates(benchmark(name))
+    assert depth_lower_bound(circuit, platforms[platform]) <= cx_depth
+
+
+def test_depth_lower_bound_counts_swaps():
+    # the circuit needs a SWAP on tenerife, which its depth does not show
+    circuit = benchmark("4mod5-v1_22")
+    assert depth_lower_bound(circuit, platforms["tenerife"]) > circuit.depth()
+
+
+@pytest.mark.parametrize("name", ["adder", "toffoli", "4mod5-v1_22"])
+def test_depth_lower_bound_is_sound_with_commutation(name: str, monkeypatch):
+    # the synthesizer searches every depth from 1 on, rather than from the bound
+    monkeypatch.setattr(
+        synthesizers.sat.phys, "depth_lower_bound", lambda *arguments: 1
+    )
+    circuit = benchmark(name)
+    solver = Glucose42()
+    output = PhysSynthesizer().synthesize(
+        circuit, platforms["tenerife"], solver, 60, Logger(0), commutation=True
+    )
+    solver.delete()
+    assert isinstance(output, SynthesizerSolution)
+    assert output.depth_times[0][0] == 1
+    assert depth_lower_bound(circuit, platforms["tenerife"], True) <= output.depth
@@ -0,0 +1,155 @@
+import inspect
+import os
+import pytest
+from qiskit import QuantumCircuit
+from pysat.solvers import Glucose42
+from configs import platforms
+from synthesizers.sat.phys import PhysOptions, PhysSynthesizer
+from util.circuits import SynthesizerSolution, remove_barriers
+from util.logger import Logger
+from util.sat import RecordingSolver
+from util.output_checker import connectivity_check, equality_check
+
+BENCHMARKS = os.path.join(os.path.dirname(__file__), "..", "benchmarks")
+
+
+def benchmark(name: str) -> QuantumCircuit:
+    return QuantumCircuit.from_qasm_file(os.path.join(BENCHMARKS, f"{name}.qasm"))
+
+
+def triangles() -> QuantumCircuit:
+    """Two components of three logical qubits that all interact."""
+    circuit = QuantumCircuit(6)
+    for offset in (0, 3):
+        circuit.cx(offset, offset + 1)
+        circuit.cx(offset + 1, offset + 2)
+        circuit.cx(offset, offset + 2)
+    return circuit
+
+
+def synthesize(
+    circuit: QuantumCircuit, platform: str, **options
+) -> SynthesizerSolution:
+    solver = Glucose42()
+    output = PhysSynthesizer().synthesize(
+        circuit, platforms[platform], solver, 60, Logger(0), **options
+    )
+    solver.delete()
+    assert isinstance(output, SynthesizerSolution)
+    assert connectivity_check(output.circuit, platforms[platform])
+    assert equality_check(
+        remove_barriers(circuit),
+        output.circuit,
+        output.initial_mapping,
+        options.get("ancillaries", False),
+        options.get("commutation", False),
+    )
+    return output
+
+
+def test_cached_platform_clauses_match_fresh_encoding(tmp_path, monkeypatch):
+    # the platform layers are encoded and replayed in the run, then saved to a cold
+    # cache and finally loaded from the warm one, all with the same clauses
+    monkeypatch.setenv("QUILLS_CACHE_DIR", str(tmp_path))
+    formulas = []
+    for platform_cache in (False, True, True):
+        solver = RecordingSolver(Glucose42())
+        output = PhysSynthesizer().synthesize(
+            benchmark("4mod5-v1_22"),
+            platforms["tenerife"],
+            solver,
+            60,
+            Logger(0),
+            platform_cache=platform_cache,
+        )
+        solver.delete()
+        assert isinstance(output, SynthesizerSolution)
+        formulas.append(list(solver.recorded.clauses()))
+    assert os.listdir(tmp_path)
+    assert formulas[0] == formulas[1] == formulas[2]
+
+
+def test_carried_phases_without_router_support_encoding():
+    # the placement of the router must not replace the neighbours of the encoding
+    output = synthesize(
+        benchmark("4mod5-v1_22"),
+        "melbourne",
+        heuristic_router=False,
+        enabled_encoding="support",
+        platform_cache=False,
+    )
+    assert output.depth_times
+
+
+def test_regions_keep_depth_times():
+    output = synthesize(benchmark("tof_4"), "melbourne", region_slack=1)
+    assert output.depth_times
+
+
+def test_components_fall_back_to_joint_solve():
+    # on disjoint regions of melbourne, the triangles need depth 6 and 2 SWAPs
+    joint = synthesize(triangles(), "melbourne", swap_optimal=True)
+    split = synthesize(
+        triangles(), "melbourne", swap_optimal=True, split_components=True
+    )
+    assert (split.depth, split.swaps) == (joint.depth, joint.swaps) == (5, 1)
+
+
+def test_component_worker_errors_are_raised():
+    defaults = {
+        name: parameter.default
+        for name, parameter in inspect.signature(
+            PhysSynthesizer.synthesize
+        ).parameters.items()
+        if parameter.default is not inspect.Parameter.empty
+    }
+    solver = Glucose42()
+    with pytest.raises(RuntimeError) as error:
+        PhysSynthesizer().synthesize_components(
+            triangles(),
+            platforms["melbourne"],
+            solver,
+            60,
+            Logger(0),
+            [[0, 1, 2], [3, 4, 5]],
+            [[0, 1, 2], [3, 4, 5]],
+            PhysOptions(**{**defaults, "enabled_encoding": "unknown"}),
+        )
+    solver.delete()
+    assert "Unknown encoding" in str(error.value.__cause__)
+
+
+def test_components_drop_barriers():
+    circuit = triangles()
+    circuit.barrier()
+    circuit.cx(0, 1)
+    circuit.cx(3, 4)
+    output = synthesize(
+        circuit, "tokyo", split_components=True, subgraph_embedding=False
+    )
+    # the barrier is dropped rather than treated as a gate spanning both components
+    assert output.depth == 4 and output.gap == 0
+
+
+def test_components_reject_classical_bits():
+    circuit = triangles()
+    circuit.measure_all()
+    solver = Glucose42()
+    with pytest.raises(ValueError):
+        PhysSynthesizer().synthesize(
+            circuit,
+            platforms["tokyo"],
+            solver,
+            60,
+            Logger(0),
+            split_components=True,
+        )
+    solver.delete()
+
+
+def test_maxsat_swap_search_agrees_with_bounds():
+    circuit = benchmark("4mod5-v1_22")
+    bounds = synthesize(circuit, "tenerife", swap_optimal=True)
+    maxsat = synthesize(circuit, "tenerife", swap_optimal=True, swap_search="maxsat")
+    assert (maxsat.depth, maxsat.swaps) == (bounds.depth, bounds.swaps) == (15, 1)
+    assert maxsat.swap_lower_bound == 1
@@ -0,0 +1,54 @@
+import itertools
+from pysat.solvers import Glucose42
+from util.sat import BufferSink, LayerTemplate, lex_leq, new_block, reset
+
+# the first atom of every layer; the first layers are narrower than the later ones
+LAYER_STARTS = [1, 3, 7, 12, 17, 22, 27, 32]
+
+
+def layer_clauses(t: int) -> list[list[int]]:
+    """Clauses of layer t over its own atoms and those of the two layers before it."""
+    here, before, earlier = LAYER_STARTS[t], LAYER_STARTS[t - 1], LAYER_STARTS[t - 2]
+    return [
+        [here, -before],
+        [-(here + 2), earlier + 1, here + 4],
+        [-(before + 1), -(here + 3)],
+        [here + 1],
+    ]
+
+
+def record(t: int) -> LayerTemplate:
+    buffer = BufferSink()
+    buffer.formula(layer_clauses(t))
+    return LayerTemplate.record(buffer.buffer, LAYER_STARTS, t, 5)
+
+
+def test_layer_template_replays_shifted_clauses():
+    template = record(3)
+    for t in range(3, len(LAYER_STARTS)):
+        assert list(template.replay(LAYER_STARTS, t)) == layer_clauses(t)
+
+
+def test_layer_template_survives_saving(tmp_path):
+    path = str(tmp_path / "layer.npy")
+    record(3).save(path)
+    template = LayerTemplate.load(path)
+    assert template.width == 5
+    assert list(template.replay(LAYER_STARTS, 7)) == layer_clauses(7)
+
+
+def test_lex_leq_allows_exactly_the_lexicographically_smaller_assignments():
+    reset()
+    atoms = new_block("", 5)
+    # the third position compares an atom with itself, so it is skipped
+    xs = [atoms[0], atoms[1], atoms[2], atoms[3]]
+    ys = [atoms[4], atoms[3], atoms[2], atoms[1]]
+    solver = Glucose42(bootstrap_with=lex_leq(xs, ys))
+    for values in itertools.product([False, True], repeat=5):
+        assumptions = [
+            atom if value else -atom for atom, value in zip(atoms.atoms(), values)
+        ]
+        x_values = [values[atom - atoms[0]] for atom in xs]
+        y_values = [values[atom - atoms[0]] for atom in ys]
+        assert solver.solve(assumptions=assumptions) == (x_values <= y_values)
+    solver.delete()